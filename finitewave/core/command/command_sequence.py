@@ -1,8 +1,19 @@
+import heapq
+
+from finitewave.core.command.command import Command
 
 
 class CommandSequence:
     """Manages a sequence of commands to be executed during a simulation.
 
+    Commands with an execution time and the default ``update_status`` are
+    kept in a min-heap on their time, so a step without due commands costs
+    a single comparison. Commands without a time or with a custom
+    ``update_status`` are checked at every step until they have passed.
+    After commands are executed the schedule is rebuilt from the current
+    ``t`` and ``passed`` of all commands, so a command can re-arm itself
+    (or another one) by resetting ``passed`` or moving ``t``.
+
     Attributes
     ----------
     sequence : list
@@ -16,6 +27,8 @@ class CommandSequence:
     def __init__(self):
         self.sequence = []
         self.model = None
+        self._heap = []
+        self._polled = []
 
     def initialize(self, model):
         """
@@ -30,6 +43,7 @@ class CommandSequence:
         self.model = model
         for command in self.sequence:
             command.passed = False
+        self._reschedule()
 
     def add_command(self, command):
         """
@@ -41,19 +55,64 @@ class CommandSequence:
             The command instance to be added to the sequence.
         """
         self.sequence.append(command)
+        if self.model is not None:
+            self._schedule(len(self.sequence) - 1, command)
 
     def remove_commands(self):
         """
         Clears the sequence of all commands.
         """
         self.sequence = []
+        self._heap = []
+        self._polled = []
 
     def execute_next(self):
         """
         Executes commands whose time has arrived and which have not been
         executed yet.
         """
-        for command in self.sequence:
-            if not command.passed and command.update_status(self.model):
-                command.execute(self.model)
+        due = []
+        while self._heap and self._heap[0][0] <= self.model.t:
+            _, index, command = heapq.heappop(self._heap)
+            if command.passed:
+                continue
+            if command.update_status(self.model):
+                due.append((index, command))
+            else: # t was moved after it was scheduled
+                self._schedule(index, command)
+
+        if self._polled:
+            for index, command in self._polled:
+                if not command.passed and command.update_status(self.model):
+                    due.append((index, command))
+            # executed commands are not polled anymore
+            self._polled = [item for item in self._polled
+                            if not item[1].passed]
+
+        if not due:
+            return
+
+        # same order as the sequence when several commands are due
+        for _, command in sorted(due, key=lambda item: item[0]):
+            self.model.synchronize()
+            command.execute(self.model)
+            self.model.synchronize(to_device=True)
+
+        # the commands may have re-armed themselves or changed other
+        # commands' times
+        self._reschedule()
+
+    def _reschedule(self):
+        self._heap = []
+        self._polled = []
+        for index, command in enumerate(self.sequence):
+            if not command.passed:
+                self._schedule(index, command)
 
+    def _schedule(self, index, command):
+        scheduled = (command.t is not None and
+                     type(command).update_status is Command.update_status)
+        if scheduled:
+            heapq.heappush(self._heap, (command.t, index, command))
+        else:
+            self._polled.append((index, command))
@@ -4,6 +4,18 @@ import warnings
 from tqdm import tqdm
 import numpy as np
 import numba
+from numba import njit, prange
+from numba.core.dispatcher import Dispatcher
+
+
+@njit(parallel=True, cache=True)
+def _parallel_fill(arr, value):
+    # fill row blocks in parallel: on NUMA machines the pages are then
+    # first touched by the threads whose kernel iterations read them
+    flat = arr.reshape(arr.shape[0], -1)
+    for i in prange(flat.shape[0]):
+        for j in range(flat.shape[1]):
+            flat[i, j] = value
 
 
 class CardiacModel(ABC):
@@ -52,6 +64,30 @@ class CardiacModel(ABC):
         The floating-point type used for numerical computations.
     state_vars : list
         List of state variables to save and load during simulation.
+    kernel_loop : str
+        Traversal used by the ionic kernel (default ``"auto"``, see
+        ``_auto_kernel_loop``): ``"sparse"`` loops over the
+        myocyte coordinates, ``"masked"`` sweeps the mesh row by row skipping
+        non-myocyte nodes, ``"dense"`` sweeps the mesh interior without any
+        check (requires the whole interior to be myocardium), ``"tiled"``
+        sweeps the mesh in cache-sized blocks skipping non-myocyte nodes.
+    fuse_diffusion : bool
+        Whether to compute the diffusion inside the ionic kernel, in the same
+        pass over the mesh, instead of running a separate diffusion kernel
+        (default True). Nodes of the tissue bulk then share a single row of
+        weights. The ``"numpy"`` device always runs a separate diffusion
+        kernel.
+    specialize_parameters : bool
+        Whether to compile the scalar model parameters into the ionic kernel
+        as constants, which lets the compiler fold them. The parameters can
+        then only be changed by re-initializing the model.
+    device : str
+        Where the ionic kernel runs: ``"cpu"``, ``"cuda"`` or ``"numpy"``. On
+        CUDA the model state stays on the device and only the potential is
+        copied to the host every step; other variables are copied by
+        ``synchronize()``. ``"numpy"`` runs the kernel as vectorized NumPy
+        expressions over blocks of myocytes, the ops' math functions and
+        ``calc_where`` being replaced by their NumPy versions.
     """
     def __init__(self):
         self.meta = {}
@@ -82,6 +118,18 @@ class CardiacModel(ABC):
         self.prog_bar = True
         self.npfloat = np.float64
         self.state_vars = []
+        self.kernel_loop = "auto"
+        self.fuse_diffusion = True
+        self.specialize_parameters = False
+        self._fused_diffusion = False
+        self._diffusion_args = {}
+        self.device = "cpu"
+        self._kernel = None
+        self._bound_kernel_args = None
+        self._kernel_entry = None
+        self._kernel_entry_types = None
+        self._kernel_constants = {}
+        self._weights_key = None
 
     @abstractmethod
     def run_ionic_kernel(self):
@@ -96,8 +144,8 @@ class CardiacModel(ABC):
         Initializes the model for simulation. Sets up arrays, computes weights,
         and initializes stimuli, trackers, and commands.
         """
-        self.u = np.zeros_like(self.cardiac_tissue.mesh, dtype=self.npfloat)
-        self.u_new = self.u.copy()
+        self._fill_state_array("u", 0.)
+        self._fill_state_array("u_new", 0.)
         self.step = 0
         self.t = 0
 
@@ -121,14 +169,23 @@ class CardiacModel(ABC):
 
     def compute_weights(self):
         """
-        Computes the weights for the stencil.
+        Computes the weights for the stencil. The weights and myocyte indexes
+        of the previous run are reused if neither the tissue (including its
+        geometry), the stencil (including its parameters) nor the
+        discretization changed.
         """
-        self.cardiac_tissue.compute_myo_indexes()
-
         if self.stencil is None:
             self.stencil = self.select_stencil(self.cardiac_tissue)
 
+        key = (self.cardiac_tissue, self.cardiac_tissue.geometry_hash(),
+               self.stencil.weights_key(), self.D_model, self.dt, self.dr,
+               np.dtype(self.npfloat).str)
+        if self._weights_key is not None and self._weights_key == key:
+            return
+
+        self.cardiac_tissue.compute_myo_indexes()
         self.weights = self.stencil.compute_weights(self, self.cardiac_tissue)
+        self._weights_key = key
 
     def run(self, initialize=True, num_of_threads=None):
         """
@@ -140,10 +197,18 @@ class CardiacModel(ABC):
         initialize : bool, optional
             Whether to (re)initialize the model before running the simulation.
             Default is True.
+        num_of_threads : int, optional
+            Number of threads used by the kernels.
+
+        Notes
+        -----
+        State arrays are first touched in parallel along their first axis,
+        like the kernels traverse them. On multi-socket machines keep the
+        threads pinned so that memory stays local, e.g. with
+        ``NUMBA_THREADING_LAYER=omp`` and ``OMP_PROC_BIND=close``. The
+        threads are started once; every kernel call splits its ``prange``
+        loop into one contiguous chunk per thread.
         """
-        if initialize:
-            self.initialize()
-
         numba.set_num_threads(numba.config.NUMBA_NUM_THREADS)
 
         if num_of_threads is not None:
@@ -155,11 +220,20 @@ class CardiacModel(ABC):
             num_of_theads = min(num_of_threads, numba.config.NUMBA_NUM_THREADS)
             numba.set_num_threads(num_of_theads)
 
+        # threads are set first so that the arrays are first touched by the
+        # same threads as in the kernels
+        if initialize:
+            self.initialize()
+
         if self.t_max < self.t:
             raise ValueError("t_max must be greater than current t.")
 
         if self.state_loader:
             self.state_loader.load()
+            self.synchronize(to_device=True)
+
+        # parameters may have been changed since the last run
+        self._bound_kernel_args = None
 
         iters = int(np.ceil((self.t_max - self.t) / self.dt))
         bar_desc = f"Running {self.__class__.__name__}"
@@ -191,6 +265,11 @@ class CardiacModel(ABC):
                     self.state_saver.save()
                 break
 
+        self.synchronize()
+
+        if self.tracker_sequence:
+            self.tracker_sequence.finalize()
+
     def check_termination(self):
         """
         Checks whether the simulation should terminate based on the current
@@ -205,13 +284,48 @@ class CardiacModel(ABC):
         max_iters = int(np.ceil(self.t_max / self.dt))
         return (self.t > self.t_max) or (self.step > max_iters)
 
+    def synchronize(self, to_device=False, variables=None):
+        """
+        Synchronizes the host state arrays with the device copies used by a
+        CUDA kernel. Does nothing when the model runs on the CPU.
+
+        Parameters
+        ----------
+        to_device : bool, optional
+            If True, the device copies are refreshed from the host arrays on
+            the next kernel launch (after modifying the host state).
+            Otherwise the host arrays are updated from the device.
+        variables : list of str, optional
+            With ``to_device``, the names of the arrays that were modified in
+            place. By default all arrays and parameters are considered
+            modified or replaced.
+        """
+        if to_device and variables is None:
+            # the host arrays or parameters may have been replaced
+            self._bound_kernel_args = None
+
+        if self._kernel is None or not hasattr(self._kernel, "synchronize"):
+            return
+
+        if to_device:
+            hosts = None
+            if variables is not None:
+                hosts = [getattr(self, name) for name in variables]
+            self._kernel.invalidate(hosts)
+        else:
+            self._kernel.synchronize()
+
     def run_diffusion_kernel(self):
         """
         Executes the diffusion kernel computation using the current parameters
-        and tissue weights.
+        and tissue weights. Does nothing when the diffusion is fused into
+        the ionic kernel.
         """
+        if self._fused_diffusion:
+            return
+
         self.diffusion_kernel(self.u_new, self.u, self.weights,
-                              self.cardiac_tissue.myo_indexes)
+                              self.cardiac_tissue.myo_coords)
 
     @abstractmethod
     def select_stencil(self, cardiac_tissue):
@@ -264,9 +378,9 @@ class CardiacModel(ABC):
         # allocate state arrays
         for name in self.default_variables.keys():
             init_val = getattr(self, f"init_{name}")
-            setattr(self, name, init_val * np.ones_like(self.u, dtype=self.npfloat))
+            self._fill_state_array(name, init_val)
             if name == 'u':
-                self.u_new = self.u.copy()
+                self._fill_state_array("u_new", init_val)
 
         # validate parameter fields shapes if they are arrays
         tissue_shape = self.cardiac_tissue.mesh.shape
@@ -276,11 +390,39 @@ class CardiacModel(ABC):
                 if par.shape != tissue_shape:
                     raise ValueError(
                         f"param '{name}' shape {par.shape} != tissue shape {tissue_shape}"
-                    ) 
+                    )
+                # the kernels walk the last axis innermost, a transposed or
+                # strided field would be read with a stride of a whole row
+                if not par.flags.c_contiguous:
+                    setattr(self, name, np.ascontiguousarray(par))
     
+    def _fill_state_array(self, name, value):
+        # a new array on every initialize, so arrays kept from a previous run
+        # (e.g. u0 = model.u) keep their values; the arrays span the whole
+        # mesh since stimuli, trackers and commands index them by node
+        arr = np.empty(self.cardiac_tissue.mesh.shape, dtype=self.npfloat)
+        _parallel_fill(arr, arr.dtype.type(value))
+        setattr(self, name, arr)
+
     def _initialize_kernel(self, kernel, exclude_params=[]):
         gen = kernel()
-        self._kernel_args_order = gen.args_order[:]
+        gen.device = self._select_device()
+        gen.loop = self._select_kernel_loop()
+        self._fused_diffusion = (bool(self.fuse_diffusion)
+                                 and gen.device != "numpy")
+        self._diffusion_args = {}
+        if self._fused_diffusion:
+            # bulk nodes do not load their weights, which halves the memory
+            # traffic of a double precision kernel
+            bulk, bulk_weights = self.stencil.compute_bulk_weights(
+                self.weights, self.cardiac_tissue.myo_mask)
+            self._diffusion_args["weights"] = self.weights
+            if bulk is not None:
+                self._diffusion_args["bulk"] = bulk
+                self._diffusion_args["bulk_weights"] = bulk_weights
+            gen.diffusion = self.stencil.generate_diffusion(bulk=bulk is not None)
+            gen.diffusion_args = list(self._diffusion_args)
+        self._bound_kernel_args = None
 
         # args_order: state vars first, then all parameters (stable order for call site)
         param_names = list(self.default_parameters.keys())
@@ -299,8 +441,157 @@ class CardiacModel(ABC):
             elif isinstance(par, np.ndarray):
                 gen.arrays.append(name)
 
+        gen.float_type = np.dtype(self.npfloat).name
+        if self.specialize_parameters:
+            gen.constants = {name: float(getattr(self, name))
+                             for name in gen.args_order
+                             if name in gen.scalars
+                             and np.isfinite(getattr(self, name))}
+        self._kernel_constants = dict(gen.constants)
+        self._kernel_args_order = [name for name in gen.args_order
+                                   if name not in gen.constants]
+
         return gen
 
+    def _select_kernel_loop(self):
+        loop = self.kernel_loop
+        if loop not in ("auto", "sparse", "masked", "dense", "tiled"):
+            raise ValueError(
+                f"Unknown kernel_loop '{loop}'. "
+                "Use 'auto', 'sparse', 'masked', 'dense' or 'tiled'."
+            )
+
+        if loop == "auto":
+            loop = self._auto_kernel_loop()
+
+        if loop == "dense":
+            interior = tuple(slice(1, -1) for _ in range(self.cardiac_tissue.dimensions))
+            if not self.cardiac_tissue.myo_mask[interior].all():
+                raise ValueError(
+                    "kernel_loop 'dense' requires all interior nodes to be "
+                    "myocardium. Use 'masked' or 'sparse' instead."
+                )
+
+        # CUDA kernels run one thread per node guarded by the mask, NumPy
+        # kernels work on blocks of myocyte indexes
+        if self._device in ("cuda", "numpy"):
+            loop = "masked"
+
+        self._kernel_loop = loop
+        return loop
+
+    def _auto_kernel_loop(self):
+        """
+        Selects the kernel loop from the myocardium layout: ``"dense"`` if
+        the whole interior is myocardium, ``"masked"`` if at least a quarter
+        of the mesh is, ``"sparse"`` for sparser tissues (e.g. thin shells
+        in a large box) where visiting every node costs more than gathering.
+        """
+        tissue = self.cardiac_tissue
+        interior = tuple(slice(1, -1) for _ in range(tissue.dimensions))
+        if tissue.myo_mask[interior].all():
+            return "dense"
+
+        if tissue.myo_indexes.size >= 0.25 * tissue.myo_mask.size:
+            return "masked"
+
+        return "sparse"
+
+    def _select_device(self):
+        if self.device not in ("cpu", "cuda", "numpy"):
+            raise ValueError(
+                f"Unknown device '{self.device}'. "
+                "Use 'cpu', 'cuda' or 'numpy'."
+            )
+
+        self._device = self.device
+        return self._device
+
+    def _kernel_args(self):
+        # the arguments are bound once per run (and after commands), only
+        # the swapped u/u_new buffers and the step change between steps
+        args = self._bound_kernel_args
+        if args is None:
+            args = self._bound_kernel_args = self._bind_kernel_args()
+            self._kernel_entry = None
+            if hasattr(self._kernel, "retain"):
+                # u and u_new are swapped between the bound positions
+                self._kernel.retain([*args, self.u, self.u_new])
+
+        args[0] = self.u_new
+        args[3] = self.step
+        if self._u_arg is not None:
+            args[self._u_arg] = self.u
+        return args
+
+    def _run_kernel(self):
+        args = self._kernel_args()
+        types = self._swapped_arg_types(args)
+        if self._kernel_entry is None or types != self._kernel_entry_types:
+            self._kernel_entry = self._resolve_kernel_entry(args)
+            self._kernel_entry_types = types
+        self._kernel_entry(*args)
+
+    def _swapped_arg_types(self, args):
+        # u and u_new are swapped every step, the entry is resolved again
+        # when they stop having the types it was compiled for
+        arrays = [args[0]]
+        if self._u_arg is not None:
+            arrays.append(args[self._u_arg])
+        return tuple((a.dtype, a.ndim, a.flags.c_contiguous) for a in arrays)
+
+    def _resolve_kernel_entry(self, args):
+        # The compiled version of a numba kernel for the types of the bound
+        # arguments is called directly, without the type dispatch of every
+        # call. The arguments keep their types until they are bound again.
+        kernel = self._kernel
+        if not isinstance(kernel, Dispatcher):
+            return kernel
+        return kernel.compile(tuple(kernel.typeof_pyval(a) for a in args))
+
+    def _bind_kernel_args(self):
+        # scalars are cast to the state precision, otherwise a float32
+        # kernel would promote its arithmetic to float64
+        ftype = np.dtype(self.npfloat).type
+        for name, value in self._kernel_constants.items():
+            if getattr(self, name) != value:
+                raise ValueError(
+                    f"Parameter '{name}' is compiled into the kernel "
+                    "(specialize_parameters=True). Re-initialize the model "
+                    "to change it."
+                )
+
+        # state arrays replaced since the last binding (e.g. by a state
+        # loader or a command) are cast to the model precision
+        dtype = np.dtype(self.npfloat)
+        for name in ("u", "u_new", *self.state_vars):
+            value = getattr(self, name)
+            if isinstance(value, np.ndarray) and value.dtype != dtype:
+                setattr(self, name, value.astype(dtype))
+
+        args = []
+        for name in self._kernel_args_order:
+            value = getattr(self, name)
+            if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+                value = ftype(value)
+            args.append(value)
+
+        base = [self.u_new, self._kernel_domain(), ftype(self.dt), self.step]
+        base.extend(self._diffusion_args.values())
+
+        self._u_arg = None
+        if "u" in self._kernel_args_order:
+            self._u_arg = len(base) + self._kernel_args_order.index("u")
+
+        return [*base, *args, *self._buffs]
+
+    def _kernel_domain(self):
+        if self._device == "numpy":
+            return self.cardiac_tissue.myo_indexes
+        if self._kernel_loop == "sparse":
+            return self.cardiac_tissue.myo_coords
+        return self.cardiac_tissue.myo_mask
+
     def _form_and_verify_observers(self):
         buffs = []
         for obs in self.observers:
@@ -1,4 +1,5 @@
 import re
+import textwrap
 import warnings
 
 
@@ -9,20 +10,59 @@ class IonicKernelGenerator:
     Conventions:
     - arrays: names passed as array arguments (e.g., u, v, gating variables, current fields)
     - scalars: names passed as scalar arguments (e.g., parameters)
+    - tables: names of arrays passed whole, not indexed per node (e.g., lookup tables)
     - observers: list of dicts: {"name": <arg_name>, "expr": <code>}
       where expr is injected at the end of the per-cell loop body.
 
     Observer notes:
     - This is advanced instrumentation; expr must be numba-friendly and race-safe.
     - Better no dynamic append / allocation in parallel kernels.
+
+    Loop modes (``loop``):
+    - "sparse": parallel loop over the myocyte ``coords`` (one int32 row per
+      axis), so no flat index has to be split by division.
+    - "masked": parallel row sweep over the whole mesh, skipping nodes where
+      ``mask`` is False. Contiguous along the last axis.
+    - "dense": parallel row sweep over the mesh interior without any check.
+      Only valid when every interior node is myocardium.
+    - "tiled": like "masked" but the mesh is split into cache-sized blocks
+      (``tile`` nodes per axis) which are distributed over the threads.
+
+    Fused diffusion (``diffusion``):
+    - source expression of the diffusion update from the stencil. When set,
+      the kernel takes ``u`` and ``weights`` and computes ``u_new`` itself,
+      so the potential is read once per step instead of in a separate pass.
+      The arrays it reads besides ``u`` are listed in ``diffusion_args``.
+
+    Constants (``constants``):
+    - scalar parameters compiled into the kernel as literals of
+      ``float_type`` instead of being passed as arguments, so the compiler
+      can fold them. They are left out of the kernel arguments.
+
+    Device (``device``):
+    - "cpu": numba parallel kernel (``generate_cpu_numba``).
+    - "cuda": CUDA kernel with one thread per node (``generate_cuda``).
+      Always uses the ``mask`` domain.
+    - "numpy": plain NumPy function over blocks of the flat myocyte
+      ``indexes`` (``generate_numpy``, ``tile`` indexes per block). The ops
+      run elementwise on arrays; no fused diffusion or observers.
     """
 
     def __init__(self):
         self.arrays = []
         self.scalars = []
-        self.args_order = [] # does not include u_new, indexes, dt, step and observers
+        self.tables = []
+        self.args_order = [] # does not include u_new, coords, dt, step and observers
         self.observers = []
         self.dimensions = 2 # default to 2D
+        self.loop = "sparse"
+        self.cache = False # on-disk numba cache, needs a file-backed source
+        self.tile = None # block size of the "tiled" loop or NumPy kernel, None for default
+        self.diffusion = None # fused diffusion expression
+        self.diffusion_args = ["weights"]
+        self.device = "cpu"
+        self.constants = {} # name -> value of scalars compiled as literals
+        self.float_type = "float64" # type of the constant literals
 
         self.names = ["u"]
         self.param_fields = set()
@@ -33,6 +73,8 @@ class IonicKernelGenerator:
         return name
         
     def _raw_indexing(self):
+        if self.device == "numpy":
+            return ".reshape(-1)[cell_]"
         if self.dimensions == 2:
             return "[i_, j_]"
         elif self.dimensions == 3:
@@ -118,31 +160,118 @@ class IonicKernelGenerator:
         return "ionic_kernel"
 
     def kernel_base_args(self) -> list[str]:
-        # common arguments: output, indexes, dt, step
-        args = ["u_new", "indexes", "dt", "step"]
-        args.extend(self.args_order)
+        # common arguments: output, coords (or mask), dt, step (, weights)
+        domain = "coords" if self.loop == "sparse" else "mask"
+        if self.device == "numpy":
+            domain = "indexes"
+        args = ["u_new", domain, "dt", "step"]
+        if self.diffusion:
+            args.extend(self.diffusion_args)
+        args.extend(a for a in self.args_order if a not in self.constants)
 
         return args
 
+    def _loop_depth(self) -> int:
+        if self.loop == "sparse":
+            return 1
+        if self.loop == "tiled":
+            return self.dimensions + 1
+        return self.dimensions
+
     def generate_loop_header(self) -> str:
-        if self.dimensions == 2:
-            return """\
-    n_j = u_new.shape[1]
-    for idx in prange(indexes.shape[0]):
-        ii = indexes[idx]
-        i_ = ii // n_j
-        j_ = ii % n_j
+        if self.loop == "sparse":
+            return self._generate_sparse_loop_header()
+        if self.loop in ("masked", "dense"):
+            return self._generate_sweep_loop_header()
+        if self.loop == "tiled":
+            return self._generate_tiled_loop_header()
+        raise ValueError(f"Unsupported loop mode '{self.loop}'.")
+
+    def _generate_sweep_loop_header(self) -> str:
+        loop_vars = ["i_", "j_", "k_"][:self.dimensions]
+        # dense sweeps skip the boundary layer which is never myocardium
+        start, stop = ("0", "") if self.loop == "masked" else ("1", " - 1")
+
+        lines = [f"    n_{v[0]} = u_new.shape[{d}]" for d, v in enumerate(loop_vars)]
+        for d, v in enumerate(loop_vars):
+            rng = "prange" if d == 0 else "range"
+            lines.append(f"{'    ' * (d + 1)}for {v} in {rng}({start}, n_{v[0]}{stop}):")
+
+        if self.loop == "masked":
+            ind = "    " * (len(loop_vars) + 1)
+            lines.append(f"{ind}if not mask[{', '.join(loop_vars)}]:")
+            lines.append(f"{ind}    continue")
+
+        return "\n".join(lines) + "\n"
+
+    def _generate_tiled_loop_header(self) -> str:
+        loop_vars = ["i_", "j_", "k_"][:self.dimensions]
+        axes = [v[0] for v in loop_vars]
+        # 64x64 (2D) or 16x16x16 (3D) blocks keep a tile of every state
+        # array within L2
+        tile = self.tile or (64 if self.dimensions == 2 else 16)
+
+        lines = [f"    n_{a} = u_new.shape[{d}]" for d, a in enumerate(axes)]
+        lines += [f"    nb_{a} = (n_{a} + {tile - 1}) // {tile}" for a in axes]
+        lines.append(f"    for b_ in prange({' * '.join(f'nb_{a}' for a in axes)}):")
+
+        # unravel the block number, last axis fastest
+        rest = "b_"
+        starts = []
+        for a in reversed(axes[1:]):
+            starts.append(f"        {a}0_ = ({rest} % nb_{a}) * {tile}")
+            rest = f"{rest} // nb_{a}"
+        starts.append(f"        {axes[0]}0_ = ({rest}) * {tile}")
+        lines += starts[::-1]
+
+        for d, (v, a) in enumerate(zip(loop_vars, axes)):
+            ind = "    " * (d + 2)
+            lines.append(f"{ind}for {v} in range({a}0_, min({a}0_ + {tile}, n_{a})):")
+
+        ind = "    " * (len(loop_vars) + 2)
+        lines.append(f"{ind}if not mask[{', '.join(loop_vars)}]:")
+        lines.append(f"{ind}    continue")
+
+        return "\n".join(lines) + "\n"
+
+    def _generate_sparse_loop_header(self) -> str:
+        loop_vars = ["i_", "j_", "k_"][:self.dimensions]
+
+        # coords are in row-major order (np.nonzero): consecutive nodes are
+        # mostly adjacent in memory, which the prefetcher streams better
+        # than tiled or Morton orders of the same nodes
+        lines = ["    for idx in prange(coords.shape[1]):"]
+        lines += [f"        {v} = coords[{d}, idx]" for d, v in enumerate(loop_vars)]
+        return "\n".join(lines) + "\n"
+
+    def _bind_u_new(self, body) -> str:
+        # The cell of u_new is kept in a local for the whole body and stored
+        # once at the end: the body's "u_new[...] +=" updates no longer read
+        # back and rewrite the array. With fused diffusion the local starts
+        # from the diffusion term, so u_new is only written.
+        cell = f"u_new{self._raw_indexing()}"
+        init = self.diffusion if self.diffusion else cell
+        return (f"        u_new_ = {init}\n"
+                + body.replace(cell, "u_new_").rstrip() + "\n"
+                + f"        {cell} = u_new_\n")
+
+    def _import_float_type(self) -> str:
+        if not self.constants:
+            return ""
+        return f"\nfrom numpy import {self.float_type}"
+
+    def _generate_constants(self, indent) -> str:
+        # typed literals: a bare float literal would promote float32 kernels
+        return "".join(f"{indent}{name} = {self.float_type}({float(value)!r})\n"
+                       for name, value in self.constants.items())
+
+    def generate_prologue(self) -> str:
         """
-        elif self.dimensions == 3:
-            return """\
-    n_k = u_new.shape[2]
-    n_j = u_new.shape[1]
-    for idx in prange(indexes.shape[0]):
-        ii = indexes[idx]
-        i_ = ii // (n_j * n_k)
-        j_ = (ii % (n_j*n_k))//n_k
-        k_ = (ii % (n_j*n_k)) % n_k
+        Subclasses may override this to compute loop invariants (e.g.
+        reciprocals of scalar parameters) once per call, before the loop.
+        Indented by 4 spaces.
         """
+        return ""
 
     def generate_body(self) -> str:
         """
@@ -156,18 +285,80 @@ class IonicKernelGenerator:
         loop = self.generate_loop_header()
 
         # double check required body args
-        missing = set(self.args_order)  - set(self.arrays) - set(self.scalars)
+        missing = (set(self.args_order) - set(self.arrays) - set(self.scalars)
+                   - set(self.tables))
         if missing:
             raise ValueError(f"Kernel args missing: {sorted(missing)}")
-        body = self.generate_body()
-        
+        body = self._bind_u_new(self.generate_body())
+
         obs_args, obs = self.generate_observers()
 
-        src = f"""
-@njit(parallel=True, fastmath=True)
+        # bodies are written for a single loop level (8 spaces)
+        extra = "    " * (self._loop_depth() - 1)
+        if extra:
+            body = textwrap.indent(body, extra)
+            obs = obs.replace("\n", "\n" + extra)
+
+        cache = ", cache=True" if self.cache else ""
+
+        src = f"""{self._import_float_type()}
+@njit(parallel=True, fastmath=True{cache})
 def {self.kernel_func_name()}({args + (', ' + ', '.join(obs_args) if obs_args else '')}):
-{loop}
+{self._generate_constants("    ")}{self.generate_prologue()}{loop}
+{body}
+        {extra}{obs}
+"""
+        return src
+    def generate_cuda(self) -> str:
+        args = self.kernel_base_args()
+        if args[1] != "mask":
+            raise ValueError("CUDA kernels require the 'mask' domain.")
+
+        missing = (set(self.args_order) - set(self.arrays) - set(self.scalars)
+                   - set(self.tables))
+        if missing:
+            raise ValueError(f"Kernel args missing: {sorted(missing)}")
+        body = self._bind_u_new(self.generate_body())
+
+        obs_args, obs = self.generate_observers()
+
+        loop_vars = ["i_", "j_", "k_"][:self.dimensions]
+        bounds = " and ".join(f"{v} < u_new.shape[{d}]"
+                              for d, v in enumerate(loop_vars))
+
+        # one thread per node, the body keeps its 8 spaces indentation
+        src = f"""{self._import_float_type()}
+@cuda.jit(fastmath=True)
+def {self.kernel_func_name()}({', '.join(args + obs_args)}):
+{self._generate_constants("    ")}{self.generate_prologue()}    {', '.join(loop_vars)} = cuda.grid({self.dimensions})
+    if {bounds} and mask[{', '.join(loop_vars)}]:
 {body}
         {obs}
 """
-        return src
\ No newline at end of file
+        return src
+
+    def generate_numpy(self) -> str:
+        if self.diffusion:
+            raise ValueError("NumPy kernels do not support fused diffusion.")
+        if self.observers:
+            raise ValueError("NumPy kernels do not support observers.")
+
+        missing = (set(self.args_order) - set(self.arrays) - set(self.scalars)
+                   - set(self.tables))
+        if missing:
+            raise ValueError(f"Kernel args missing: {sorted(missing)}")
+
+        # the per-cell body works on blocks of myocytes at once (flat
+        # indexes), small enough for the temporaries of the ops to stay in
+        # cache
+        body = self._bind_u_new(self.generate_body())
+        block = self.tile or 16384
+
+        src = f"""{self._import_float_type()}
+def {self.kernel_func_name()}({', '.join(self.kernel_base_args())}):
+{self._generate_constants("    ")}{self.generate_prologue()}\
+    for c_ in range(0, indexes.shape[0], {block}):
+        cell_ = indexes[c_:c_ + {block}]
+{body}
+"""
+        return src
@@ -52,14 +52,18 @@ class StateLoader:
         it in the given model.
 
         This method loads each variable listed in the model's ``state_vars``
-        attribute from numpy files and sets these variables in the model.
+        attribute from numpy files and sets these variables in the model,
+        cast to the model precision ``npfloat``.
         """
         if self.passed:
             return
 
+        # the state may have been saved at another precision than the
+        # model runs with (e.g. float64 states of a float32 model)
+        dtype = np.dtype(self.model.npfloat)
         for var in self.model.state_vars:
             val = self._load_variable(Path(self.path).joinpath(var + ".npy"))
-            setattr(self.model, var, val)
+            setattr(self.model, var, np.ascontiguousarray(val, dtype=dtype))
 
         self.passed = True
 
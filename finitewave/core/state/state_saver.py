@@ -70,6 +70,7 @@ class StateSaver:
         if not Path(self.path).exists():
             Path(self.path).mkdir(parents=True, exist_ok=True)
 
+        self.model.synchronize()
         for var in self.model.state_vars:
             self._save_variable(Path(self.path).joinpath(var + ".npy"),
                                 self.model.__dict__[var])
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 
 class Stencil(ABC):
     """Base class for calculating stencil weights used in numerical
@@ -9,7 +11,15 @@ class Stencil(ABC):
     weights for numerical simulations. It includes a caching mechanism to
     optimize performance by reducing the number of symbolic calculations. Also,
     it handles the boundary conditions for the numerical scheme.
+
+    Attributes
+    ----------
+    offsets : tuple or None
+        Neighbour offsets of the stencil in the order of the weights. Used to
+        fuse the diffusion update into generated ionic kernels.
     """
+    offsets = None
+
     @abstractmethod
     def compute_weights(self, model, cardiac_tissue):
         """
@@ -34,6 +44,19 @@ class Stencil(ABC):
         """
         pass
 
+    def weights_key(self):
+        """
+        Returns a hashable key of the stencil parameters the weights depend
+        on. Models reuse the weights of a previous run while it is unchanged.
+        Subclasses with parameters must add them.
+
+        Returns
+        -------
+        tuple
+            The stencil type and its parameters.
+        """
+        return (type(self),)
+
     @abstractmethod
     def select_diffusion_kernel():
         """
@@ -44,3 +67,81 @@ class Stencil(ABC):
         diffusion of the potential in the tissue mesh.
         """
         pass
+
+    def compute_bulk_weights(self, weights, myo_mask):
+        """
+        Finds the nodes of the tissue bulk: myocytes with the same weights as
+        a node surrounded by myocytes. In homogeneous tissue these are all
+        nodes away from the boundaries, their update can use a single row of
+        weights instead of loading their own.
+
+        Parameters
+        ----------
+        weights : np.ndarray
+            The stencil weights, one row per node.
+        myo_mask : np.ndarray
+            Boolean mask of the myocyte nodes.
+
+        Returns
+        -------
+        tuple
+            The boolean mask of the bulk nodes and their weights, or
+            ``(None, None)`` if less than half of the myocytes are bulk nodes.
+        """
+        if self.offsets is None:
+            return None, None
+
+        axes = tuple(range(myo_mask.ndim))
+        core = myo_mask.copy()
+        for offset in self.offsets:
+            core &= np.roll(myo_mask, [-o for o in offset], axis=axes)
+
+        if not core.any():
+            return None, None
+
+        bulk_weights = weights[np.unravel_index(np.argmax(core), core.shape)].copy()
+        bulk = myo_mask & np.all(weights == bulk_weights, axis=-1)
+        if np.count_nonzero(bulk) < 0.5 * np.count_nonzero(myo_mask):
+            return None, None
+
+        return bulk, bulk_weights
+
+    def generate_diffusion(self, bulk=False):
+        """
+        Generates the source of the diffusion update at the node
+        ``(i_, j_[, k_])`` of a generated kernel, reading ``u`` and
+        ``weights``. Gives the same result as the diffusion kernel.
+
+        Parameters
+        ----------
+        bulk : bool, optional
+            If True, nodes where ``bulk`` is set use the single row of
+            weights ``bulk_weights`` (see ``compute_bulk_weights``).
+
+        Returns
+        -------
+        str
+            The expression of the updated potential.
+        """
+        if self.offsets is None:
+            raise NotImplementedError(
+                f"{self.__class__.__name__} does not support fused diffusion."
+            )
+
+        loop_vars = ["i_", "j_", "k_"][:len(self.offsets[0])]
+        center = ", ".join(loop_vars)
+
+        terms = []
+        bulk_terms = []
+        for n, offset in enumerate(self.offsets):
+            index = ", ".join(f"{v}{o:+d}" if o else v
+                              for v, o in zip(loop_vars, offset))
+            terms.append(f"u[{index}] * weights[{center}, {n}]")
+            bulk_terms.append(f"u[{index}] * bulk_weights[{n}]")
+
+        expr = "(" + " +\n            ".join(terms) + ")"
+        if not bulk:
+            return expr
+
+        return ("((" + " +\n            ".join(bulk_terms) + ")"
+                + f" if bulk[{center}] else\n            " + expr + ")")
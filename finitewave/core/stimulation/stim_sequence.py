@@ -71,7 +71,13 @@ class StimSequence:
         is due to be applied and has not yet been marked as passed, it is
         stimulated and then marked as done.
         """
+        stimulated = False
         for stim in self.sequence:
             if self.model.t >= stim.t and not stim.passed:
                 stim.stimulate(self.model)
                 stim.update_status(self.model)
+                stimulated = True
+
+        if stimulated:
+            # stimuli change the potential on the host
+            self.model.synchronize(to_device=True, variables=["u"])
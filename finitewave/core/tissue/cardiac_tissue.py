@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import copy
+import hashlib
 import numpy as np
 
 
@@ -58,14 +59,39 @@ class CardiacTissue(ABC):
 
     def compute_myo_indexes(self):
         """
-        Computes flat indices of the myocytes in the tissue mesh.
+        Computes flat indices of the myocytes in the tissue mesh. The boolean
+        mask of the same nodes is stored in ``myo_mask`` and their
+        coordinates, one int32 row per axis, in ``myo_coords``.
         """
+        myo_mask = self.mesh == 1
         if self.special_boundaries is not None:
-            self.myo_indexes = np.flatnonzero((self.mesh == 1) &
-                                              (self.special_boundaries == 0))
-            return
+            myo_mask &= self.special_boundaries == 0
 
-        self.myo_indexes = np.flatnonzero(self.mesh == 1)
+        self.myo_mask = myo_mask
+        self.myo_indexes = np.flatnonzero(myo_mask)
+        self.myo_coords = np.array(np.nonzero(myo_mask), dtype=np.int32)
+
+    def geometry_hash(self):
+        """
+        Computes a digest of the tissue geometry: the mesh, conductivity,
+        fibers and special boundaries. It changes whenever one of them is
+        modified, including in place.
+
+        Returns
+        -------
+        str
+            The hexadecimal digest of the geometry.
+        """
+        h = hashlib.sha1()
+        for value in (self.mesh, self.conductivity, self.fibers,
+                      self.special_boundaries):
+            if value is None:
+                h.update(b"none")
+                continue
+            value = np.ascontiguousarray(value)
+            h.update(f"{value.dtype.str}{value.shape}".encode())
+            h.update(value.data)
+        return h.hexdigest()
 
     def add_boundaries(self):
         """
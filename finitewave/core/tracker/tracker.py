@@ -82,6 +82,13 @@ class Tracker(ABC):
 
         self._track()
 
+    def finalize(self):
+        """
+        Called at the end of every run of the model. Trackers that defer
+        work (e.g. writing to disk) complete it here.
+        """
+        pass
+
     def clone(self):
         """
         Creates a deep copy of the current tracker instance.
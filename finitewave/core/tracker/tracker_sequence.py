@@ -62,3 +62,10 @@ class TrackerSequence:
         """
         for tracker in self.sequence:
             tracker.track()
+
+    def finalize(self):
+        """
+        Executes the `finalize` method of each tracker in the sequence.
+        """
+        for tracker in self.sequence:
+            tracker.finalize()
@@ -0,0 +1,163 @@
+import math
+import types
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import cuda
+except ImportError: # numba built without the CUDA target
+    cuda = None
+
+
+def cuda_available():
+    """
+    Returns True if a CUDA device can be used by numba.
+    """
+    return cuda is not None and cuda.is_available()
+
+
+_device_functions = {}
+
+
+def device_function(fn):
+    """
+    Compiles a (jitted) ops function as a CUDA device function. Functions
+    it calls through its module globals are converted as well, on a copy of
+    the globals so the CPU versions are left untouched.
+    """
+    py_func = getattr(fn, "py_func", fn)
+    if not hasattr(py_func, "__code__"): # math functions, supported as is
+        return fn
+    if py_func in _device_functions:
+        return _device_functions[py_func]
+
+    glb = dict(py_func.__globals__)
+    for name in py_func.__code__.co_names:
+        dep = glb.get(name)
+        if hasattr(dep, "py_func"):
+            glb[name] = device_function(dep)
+
+    func = types.FunctionType(py_func.__code__, glb, py_func.__name__,
+                              py_func.__defaults__, py_func.__closure__)
+    _device_functions[py_func] = cuda.jit(device=True, fastmath=True)(func)
+    return _device_functions[py_func]
+
+
+class CudaKernelLauncher:
+    """
+    Runs a generated CUDA ionic kernel on host arguments.
+
+    Every host array gets a device copy at its first launch that is reused
+    afterwards, so the state stays on the device between steps. Only the
+    arrays in ``stage_in`` are uploaded at every launch and the ones in
+    ``stage_out`` downloaded after it (the potential, which stimuli and
+    trackers use on the host). Other arrays are copied back to the host by
+    ``synchronize``.
+    """
+
+    def __init__(self, kernel, arg_names, stage_in=(), stage_out=(),
+                 sync_names=()):
+        self.kernel = kernel
+        self.arg_names = list(arg_names)
+        self.stage_in = set(stage_in)
+        self.stage_out = set(stage_out)
+        self.sync_names = set(sync_names)
+        self._mirrors = {} # id(host) -> (host, device array, name)
+        self._stale = set()
+
+    def __call__(self, *args):
+        dev_args = [self._device_array(name, arg) if isinstance(arg, np.ndarray)
+                    else arg
+                    for name, arg in zip(self.arg_names, args)]
+
+        shape = args[0].shape
+        threads = (16, 16) if len(shape) == 2 else (8, 8, 4)
+        blocks = tuple(math.ceil(n / t) for n, t in zip(shape, threads))
+        self.kernel[blocks, threads](*dev_args)
+
+        for name, host, dev in zip(self.arg_names, args, dev_args):
+            if name in self.stage_out:
+                dev.copy_to_host(host)
+
+    def _device_array(self, name, host):
+        key = id(host)
+        entry = self._mirrors.get(key)
+        if entry is None or entry[0] is not host:
+            dev = cuda.to_device(host)
+            self._mirrors[key] = (host, dev, name)
+            self._stale.discard(key)
+            return dev
+
+        dev = entry[1]
+        if name in self.stage_in or key in self._stale:
+            dev.copy_to_device(host)
+            self._stale.discard(key)
+        return dev
+
+    def retain(self, hosts):
+        """
+        Drops the device copies of host arrays that are not in ``hosts``.
+        Used when the arguments are bound again, so arrays replaced on the
+        host (by a state loader, a command or a precision cast) do not keep
+        their device memory.
+        """
+        keep = {id(host) for host in hosts}
+        for key in [key for key in self._mirrors if key not in keep]:
+            del self._mirrors[key]
+            self._stale.discard(key)
+
+    def synchronize(self):
+        """
+        Copies the device state back to the host arrays.
+        """
+        for host, dev, name in self._mirrors.values():
+            if name in self.sync_names:
+                dev.copy_to_host(host)
+
+    def invalidate(self, hosts=None):
+        """
+        Marks the device copies of the given host arrays (all if None) as
+        outdated, they are uploaded again at the next launch. Used after the
+        host arrays were modified.
+        """
+        if hosts is None:
+            self._stale = set(self._mirrors)
+        else:
+            self._stale.update(id(host) for host in hosts
+                               if id(host) in self._mirrors)
+
+
+@lru_cache(maxsize=64)
+def _build_cached(src, func_name, glb_key):
+    glb = {"cuda": cuda, **{name: device_function(fn) for name, fn in glb_key}}
+    exec(src, glb)
+    return glb[func_name]
+
+
+def build_cuda_kernel(gen, glb):
+    """
+    Builds the CUDA version of a configured kernel generator and returns
+    the launcher and the kernel source.
+    """
+    if not cuda_available():
+        raise RuntimeError("No CUDA device available for numba.")
+
+    src = gen.generate_cuda()
+    glb_key = tuple(sorted(glb.items(), key=lambda kv: kv[0]))
+    kernel = _build_cached(src, gen.kernel_func_name(), glb_key)
+
+    obs_names = [o["name"] for o in gen.observers]
+    # u is the u_new downloaded at the previous step (the host swaps them),
+    # stimuli mark it when they change it; without fused diffusion u_new
+    # holds the host diffusion
+    stage_in = [] if gen.diffusion else ["u_new"]
+
+    launcher = CudaKernelLauncher(
+        kernel,
+        gen.kernel_base_args() + obs_names,
+        stage_in=stage_in,
+        stage_out=["u_new"],
+        sync_names=[*gen.arrays, *obs_names],
+    )
+    return launcher, src
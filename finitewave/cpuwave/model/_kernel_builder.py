@@ -1,6 +1,14 @@
+import hashlib
+import inspect
+import os
+import sys
+import types
 from functools import lru_cache
+from pathlib import Path
 from numba import njit, prange
 from finitewave.core.model.ionic_kernel_generator import IonicKernelGenerator
+from finitewave.cpuwave.model._cuda import build_cuda_kernel
+from finitewave.cpuwave.model._numpy import build_numpy_kernel
 
 
 def _freeze_observers(observers):
@@ -8,39 +16,118 @@ def _freeze_observers(observers):
         return tuple()
     return tuple((o["name"], o["expr"]) for o in observers)
 
-@lru_cache(maxsize=64)
-def _build_cached(gen, dimensions, observers_key, glb_key):
-    gen.dimensions = dimensions
-    gen.observers = [{"name": n, "expr": e} for (n, e) in observers_key]
 
-    src = gen.generate_cpu_numba()
+def kernel_cache_dir():
+    """
+    Directory for generated kernel sources and their numba cache. Can be set
+    with the ``FINITEWAVE_CACHE_DIR`` environment variable. Returns None if
+    the directory is not writable (kernels are then compiled in memory).
+    """
+    path = os.environ.get("FINITEWAVE_CACHE_DIR")
+    if path is None:
+        path = Path.home() / ".cache" / "finitewave" / "kernels"
+
+    path = Path(path)
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+
+    if not os.access(path, os.W_OK):
+        return None
+    return path
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _globals_digest(glb_key):
+    # numba does not track callees when loading cached code, so the source
+    # of the injected calc_* (their ops modules) and their jit options are
+    # part of the kernel name
+    h = hashlib.sha1()
+    for name, fn in glb_key:
+        h.update(name.encode())
+        h.update(repr(sorted(getattr(fn, "targetoptions", {}).items())).encode())
+        py_func = getattr(fn, "py_func", fn)
+        try:
+            h.update(_file_digest(inspect.getfile(py_func)).encode())
+        except (TypeError, OSError):
+            h.update(repr(fn).encode())
+    return h.hexdigest()
+
+
+def _write_source(cache_dir, src, glb_key):
+    h = hashlib.sha1(src.encode())
+    h.update(_globals_digest(glb_key).encode())
+    path = Path(cache_dir, f"ionic_kernel_{h.hexdigest()[:16]}.py")
 
-    loc = {}
+    if not path.exists():
+        # write-then-rename so concurrent processes never see partial files
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(src)
+        os.replace(tmp, path)
+    return path
+
+
+@lru_cache(maxsize=64)
+def _build_cached(src, func_name, glb_key, cache_dir):
     glb = { # dict of injected globals (calc_*, etc.)
         "njit": njit,
         "prange": prange,
-        **dict(glb_key),        
+        **dict(glb_key),
     }
-    exec(src, glb, loc)
 
-    return loc[gen.kernel_func_name()], src
+    if cache_dir is None:
+        exec(src, glb)
+        return glb[func_name]
+
+    # numba re-imports the module of a cached function to rebuild its
+    # environment, so the kernel lives in a module registered in sys.modules
+    path = _write_source(cache_dir, src, glb_key)
+    module = types.ModuleType(f"_finitewave_{path.stem}")
+    module.__file__ = str(path)
+    module.__dict__.update(glb)
+    exec(compile(src, str(path), "exec"), module.__dict__)
+    sys.modules[module.__name__] = module
+
+    return getattr(module, func_name)
 
 def build_kernel(gen: IonicKernelGenerator, glb: dict, dimensions: int,
                  observers=()):
     """
-    gen: *instance* used only to pass class + defaults; build uses its class.
+    gen: *instance* configured by the model (arrays, scalars, loop).
     glb: injected globals for exec (calc_* etc.) — must be stable for caching
+
+    Kernels are cached in memory by their source. When a writable cache
+    directory is available, the source is also written to disk and compiled
+    with ``cache=True`` so the JIT warm-up is paid once per machine.
+
+    For ``gen.device == "cuda"`` a ``CudaKernelLauncher`` is returned instead
+    of the kernel, it is called with the same (host) arguments. For
+    ``"numpy"`` the kernel is a plain python function.
     """
-    observers_key = _freeze_observers(observers)
+    gen.dimensions = int(dimensions)
+    gen.observers = [{"name": n, "expr": e}
+                     for (n, e) in _freeze_observers(observers)]
+
+    if gen.device == "cuda":
+        return build_cuda_kernel(gen, glb)
+
+    if gen.device == "numpy":
+        return build_numpy_kernel(gen, glb)
+
+    cache_dir = kernel_cache_dir()
+    gen.cache = cache_dir is not None
+    src = gen.generate_cpu_numba()
 
     # make globals hashable for caching
     glb_key = tuple(sorted(glb.items(), key=lambda kv: kv[0]))
 
-    fn, src = _build_cached(
-        gen,
-        int(dimensions),
-        observers_key,
-        glb_key,
-    )
+    fn = _build_cached(src, gen.kernel_func_name(), glb_key,
+                       None if cache_dir is None else str(cache_dir))
 
     return fn, src
@@ -0,0 +1,66 @@
+import functools
+import types
+
+import numpy as np
+
+
+# scalar functions used by the ops and their elementwise NumPy versions,
+# ``calc_where`` is the branch helper every ops module defines
+NUMPY_FUNCTIONS = {
+    "exp": np.exp,
+    "log": np.log,
+    "sqrt": np.sqrt,
+    "tanh": np.tanh,
+    "calc_where": np.where,
+}
+
+_array_functions = {}
+
+
+def array_function(fn):
+    """
+    Converts a (jitted) ops function to a Python function working on arrays.
+    Scalar math functions and ``calc_where`` in its module globals are
+    replaced by their NumPy versions, and ops it calls are converted as well,
+    on a copy of the globals so the scalar versions are left untouched.
+    """
+    py_func = getattr(fn, "py_func", fn)
+    if py_func.__name__ in NUMPY_FUNCTIONS:
+        return NUMPY_FUNCTIONS[py_func.__name__]
+    if py_func in _array_functions:
+        return _array_functions[py_func]
+
+    glb = dict(py_func.__globals__)
+    for name in py_func.__code__.co_names:
+        if name in NUMPY_FUNCTIONS:
+            glb[name] = NUMPY_FUNCTIONS[name]
+        elif hasattr(glb.get(name), "py_func"):
+            glb[name] = array_function(glb[name])
+
+    func = types.FunctionType(py_func.__code__, glb, py_func.__name__,
+                              py_func.__defaults__, py_func.__closure__)
+    _array_functions[py_func] = func
+    return func
+
+
+def build_numpy_kernel(gen, glb):
+    """
+    Builds the NumPy version of a configured kernel generator and returns
+    the kernel and its source.
+
+    The kernel evaluates every op once over all myocytes, so the
+    exponentials run through NumPy's vectorized loops. Like the compiled
+    kernels (``fastmath``), it ignores floating point warnings, e.g. from
+    the branch ``calc_where`` does not select.
+    """
+    src = gen.generate_numpy()
+    glb = {name: array_function(fn) for name, fn in glb.items()}
+    exec(src, glb)
+    kernel = glb[gen.kernel_func_name()]
+
+    @functools.wraps(kernel)
+    def run(*args):
+        with np.errstate(all="ignore"):
+            kernel(*args)
+
+    return run, src
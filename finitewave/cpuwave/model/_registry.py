@@ -31,6 +31,10 @@ def load_ops(model_id: str):
 def wrap_calc(ops):
     """
     Here we identify all functions in the ops module that start with "calc_" or "rhs_", and we apply Numba's JIT compilation to them. 
+
+    The functions are inlined into the generated kernels at the numba IR
+    level: called out-of-line, they keep LLVM from vectorizing the kernel
+    loops (4x slower for single precision Aliev-Panfilov).
     """
     py_funcs = {}
     for name in dir(ops):
@@ -39,7 +43,7 @@ def wrap_calc(ops):
             if callable(fn):
                 py_funcs[name] = fn
 
-    jitted = {name: njit(cache=True)(fn) for name, fn in py_funcs.items()}
+    jitted = {name: njit(cache=True, inline="always")(fn) for name, fn in py_funcs.items()}
 
     for name, fn in py_funcs.items():
         g = getattr(fn, "__globals__", None)
@@ -49,7 +53,7 @@ def wrap_calc(ops):
             if dep_name in g:
                 g[dep_name] = dep_jit
 
-    jitted2 = {name: njit(cache=True)(fn) for name, fn in py_funcs.items()}
+    jitted2 = {name: njit(cache=True, inline="always")(fn) for name, fn in py_funcs.items()}
 
     return jitted2
 
@@ -41,12 +41,31 @@ class AlievPanfilovKernel(IonicKernelGenerator):
         model = {var: self._indexing(var) for var in (self.arrays + self.scalars)}
         u_new = f"u_new{self._raw_indexing()}"
         
+        # u, v (and a, k if node-specific) are loaded once into locals so
+        # that each cell touches memory once per array: one read of u and v,
+        # one write of v and one read-modify-write of u_new.
+        # In single precision, values that decay below 1e-30 (the diffusive
+        # tail ahead of a wave) are flushed to zero: they would become
+        # subnormal and every operation on them takes a slow microcode path.
+        # The flush is branch-free so the body also runs on masked NumPy
+        # arrays. Double precision results are left untouched.
+        u_out, v_out = "u_out", "v_out"
+        if self.float_type == "float32":
+            u_out = "u_out * (abs(u_out) >= 1e-30)"
+            v_out = "v_out * (abs(v_out) >= 1e-30)"
+
         return f"""\
+        u_loc = {model['u']}
+        v_loc = {model['v']}
+        a_loc = {model['a']}
+        k_loc = {model['k']}
 
-        {u_new} += dt * calc_rhs({model['u']}, {model['v']}, {model['a']}, {model['k']})
+        u_out = {u_new} + dt * calc_rhs(u_loc, v_loc, a_loc, k_loc)
+        v_out = v_loc + dt * calc_dv(v_loc, u_loc, a_loc, k_loc,
+            {model['eps']}, {model['mu1']}, {model['mu2']})
 
-        {model['v']} += dt * calc_dv({model['v']}, {model['u']}, 
-            {model['a']}, {model['k']}, {model['eps']}, {model['mu1']}, {model['mu2']})
+        {u_new} = {u_out}
+        {model['v']} = {v_out}
 """
 
 
@@ -65,7 +84,9 @@ class AlievPanfilov(CardiacModel):
     D_model : float
         Diffusion coefficient used for simulating spatial propagation.
     npfloat : str
-        Floating-point precision used in the simulation (default: 'float64').
+        Floating-point precision used in the simulation (default: 'float32').
+        Single precision is sufficient for this normalized model and halves
+        the memory traffic of the kernels. Use 'float64' for double precision.
 
     Model Variables
     ---------------
@@ -105,7 +126,7 @@ class AlievPanfilov(CardiacModel):
         """
         super().__init__()
         self.D_model = 1.
-        self.npfloat = 'float64'
+        self.npfloat = 'float32'
 
         self._initialize_variables_and_parameters(ops)
 
@@ -137,15 +158,7 @@ class AlievPanfilov(CardiacModel):
         """
         Executes the ionic kernel for the Aliev-Panfilov model.
         """
-        args = [getattr(self, name) for name in self._kernel_args_order]
-        self._kernel(
-            self.u_new,
-            self.cardiac_tissue.myo_indexes,
-            self.dt,
-            self.step,
-            *args,
-            *self._buffs,
-        )
+        self._run_kernel()
 
     def select_stencil(self, cardiac_tissue):
         """
@@ -113,15 +113,7 @@ class Barkley(CardiacModel):
         self._buffs = self._form_and_verify_observers()
 
     def run_ionic_kernel(self):
-        args = [getattr(self, name) for name in self._kernel_args_order]
-        self._kernel(
-            self.u_new,
-            self.cardiac_tissue.myo_indexes,
-            self.dt,
-            self.step,
-            *args,
-            *self._buffs,
-        )
+        self._run_kernel()
 
     def select_stencil(self, cardiac_tissue):
         """
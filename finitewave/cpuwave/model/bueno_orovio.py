@@ -208,15 +208,7 @@ class BuenoOrovio(CardiacModel):
         """
         Executes the ionic kernel for the Bueno-Orovio model.
         """
-        args = [getattr(self, name) for name in self._kernel_args_order]
-        self._kernel(
-            self.u_new,
-            self.cardiac_tissue.myo_indexes,
-            self.dt,
-            self.step,
-            *args,
-            *self._buffs,
-        )
+        self._run_kernel()
 
     def select_stencil(self, cardiac_tissue):
         """
@@ -167,15 +167,7 @@ class FentonKarma(CardiacModel):
         """
         Executes the ionic kernel for the Fenton-Karma model.
         """
-        args = [getattr(self, name) for name in self._kernel_args_order]
-        self._kernel(
-            self.u_new,
-            self.cardiac_tissue.myo_indexes,
-            self.dt,
-            self.step,
-            *args,
-            *self._buffs,
-        )
+        self._run_kernel()
 
     def select_stencil(self, cardiac_tissue):
         """
@@ -1,4 +1,6 @@
 import math
+import textwrap
+from functools import partial
 import numpy as np
 
 from finitewave.core.model.cardiac_model import CardiacModel
@@ -20,9 +22,36 @@ except KeyError as e:
     raise ImportError("TP06 model ops not found.") from e
 
 
+# gates whose steady state and time constant depend on the potential only,
+# with the functions of their steady state and time constant
+TABLE_GATES = {
+    "m": ("calc_m_inf", "calc_tau_m"),
+    "h": ("calc_h_inf", "calc_tau_h"),
+    "j": ("calc_h_inf", "calc_tau_j"),
+    "d": ("calc_d_inf", "calc_tau_d"),
+    "f": ("calc_f_inf", "calc_tau_f"),
+    "f2": ("calc_f2_inf", "calc_tau_f2"),
+    "r": ("calc_r_inf", "calc_tau_r"),
+    "s": ("calc_s_inf", "calc_tau_s"),
+    "xr1": ("calc_xr1_inf", "calc_tau_xr1"),
+    "xr2": ("calc_xr2_inf", "calc_tau_xr2"),
+    "xs": ("calc_xs_inf", "calc_tau_xs"),
+}
+
+# factors of the currents that depend on the potential only (given the
+# scalar F, R, T and n_), tabulated after the gates
+TABLE_FACTORS = ("exp_nx", "exp_n1x", "rec_inak", "ical_e", "ical_q", "rec_ipk")
+
+# potential grid of the lookup table (mV)
+TABLE_U_MIN = -120.
+TABLE_U_MAX = 80.
+TABLE_U_STEP = 0.05
+
+
 class TenTusscherPanfilov2006Kernel(IonicKernelGenerator):
-    def __init__(self):
+    def __init__(self, lookup_table=False):
         super().__init__()
+        self.lookup_table = lookup_table
         self.args_order = [
          "u", "cai", "casr", "cass", "nai", "Ki",
             "m", "h", "j", "xr1", "xr2", "xs", "r", "s",
@@ -34,16 +63,160 @@ class TenTusscherPanfilov2006Kernel(IonicKernelGenerator):
             "gkr", "pKNa", "gk1", "gna", "gbna", "KmK", "KmNa", "knak", "gcal", "gbca",
             "knaca", "KmNai", "KmCa", "ksat", "n_", "gpca", "KpCa", "gpk", "gto", "gks"
         ]
+        if self.lookup_table:
+            self.tables.append("lut")
+            self.args_order.append("lut")
+
+    def _generate_gates(self) -> str:
+        lines = []
+        if not self.lookup_table:
+            # repeated exponentials (the squared denominators of m_inf and
+            # h_inf, h_inf again for j) are computed once by the compiler
+            for gate, (inf, tau) in TABLE_GATES.items():
+                lines += [
+                    f"{gate}_inf = {inf}(u_old)",
+                    f"tau_{gate} = {tau}(u_old)",
+                    f"{gate}_new = calc_gating_variable_rush_larsen("
+                    f"{gate}_old, {gate}_inf, tau_{gate}, dt)",
+                ]
+        else:
+            if self.device == "numpy":
+                raise ValueError("NumPy kernels do not support lookup tables.")
+
+            # Rush-Larsen update with the steady state and exp(-dt/tau)
+            # interpolated linearly between the two nearest table rows
+            last = round((TABLE_U_MAX - TABLE_U_MIN) / TABLE_U_STEP) - 1
+            lines += [
+                f"lut_x = (u_old - {TABLE_U_MIN!r}) * {1 / TABLE_U_STEP!r}",
+                f"lut_k = min(max(int(lut_x), 0), {last})",
+                "lut_w = min(max(lut_x - lut_k, 0.), 1.)",
+            ]
+            for n, gate in enumerate(TABLE_GATES):
+                lines += [
+                    f"{gate}_inf = {self._table(2 * n)}",
+                    f"{gate}_new = {gate}_inf - ({gate}_inf - {gate}_old) * "
+                    f"({self._table(2 * n + 1)})",
+                ]
+
+        lines += [
+            "fcass_inf = calc_fcass_inf(cass_old)",
+            "tau_fcass = calc_tau_fcass(cass_old)",
+            "fcass_new = calc_gating_variable_rush_larsen("
+            "fcass_old, fcass_inf, tau_fcass, dt)",
+        ]
+        return "".join(f"        {line}\n" for line in lines)
+
+    def _table(self, column) -> str:
+        # column of the lookup table interpolated at the potential, a name
+        # of TABLE_FACTORS or the column number
+        if isinstance(column, str):
+            column = 2 * len(TABLE_GATES) + TABLE_FACTORS.index(column)
+        return (f"lut[lut_k, {column}] + lut_w * "
+                f"(lut[lut_k + 1, {column}] - lut[lut_k, {column}])")
+
+    def _generate_ical(self) -> str:
+        # calc_ical with its 4*(u-15)*F*F/(R*T)/(exp(x)-1) written as
+        # 2*F*x/(exp(x)-1), taken from the series 1 - x/2 + x**2/12 near
+        # u = 15 mV where the ops divide 0 by 0 (expm1 would be slower)
+        model = {name: self._indexing(name) for name in self.args_order}
+        if self.lookup_table:
+            factors = f"""\
+        ical_e = {self._table('ical_e')}
+        ical_q = {self._table('ical_q')}
+"""
+        else:
+            factors = f"""\
+        ical_x = 2 * (u_old - 15) * {model['F']} / ({model['R']} * {model['T']})
+        ical_e = exp(ical_x) - 1
+        ical_small = abs(ical_x) < 1e-4
+        ical_q = calc_where(ical_small, 1 - ical_x / 2 + ical_x * ical_x / 12,
+                            ical_x / calc_where(ical_small, 1., ical_e))
+"""
+        return factors + f"""\
+        ical = {model['gcal']} * d_old * f_old * f2_old * fcass_old * 2 * {model['F']} * ical_q * \\
+            (0.25 * (ical_e + 1) * cass_old - {model['cao']})
+"""
+
+    def _generate_pump_currents(self) -> str:
+        model = {name: self._indexing(name) for name in self.args_order}
+        if not self.lookup_table:
+            return f"""\
+        inaca = calc_inaca(
+            u_old, {model['nao']}, nai_old,
+            {model['cao']}, cai_old,
+            {model['KmNai']}, {model['KmCa']},
+            {model['knaca']}, {model['ksat']},
+            {model['n_']}, {model['F']},
+            {model['R']}, {model['T']}
+        )
+
+        inak = calc_inak(
+            u_old, nai_old, {model['ko']},
+            {model['KmK']}, {model['KmNa']},
+            {model['knak']}, {model['F']},
+            {model['R']}, {model['T']}
+        )
+"""
+        # calc_inaca and calc_inak with their potential-only factors taken
+        # from the lookup table (filled from the ops); the rest of the
+        # equations must be kept in sync with the ops
+        return f"""\
+        exp_nx = {self._table('exp_nx')}
+        exp_n1x = {self._table('exp_n1x')}
+        rec_inak = {self._table('rec_inak')}
+
+        inaca = {model['knaca']} * (1. / ({model['KmNai']} * {model['KmNai']} * {model['KmNai']} + {model['nao']} * {model['nao']} * {model['nao']})) * \\
+            (1. / ({model['KmCa']} + {model['cao']})) * \\
+            (1. / (1 + {model['ksat']} * exp_n1x)) * \\
+            (exp_nx * nai_old * nai_old * nai_old * {model['cao']} -
+             exp_n1x * {model['nao']} * {model['nao']} * {model['nao']} * cai_old * 2.5)
+
+        inak = {model['knak']} * ({model['ko']} / ({model['ko']} + {model['KmK']})) * \\
+            (nai_old / (nai_old + {model['KmNa']})) * rec_inak
+"""
+
+    def _generate_ipk(self) -> str:
+        model = {name: self._indexing(name) for name in self.args_order}
+        if self.lookup_table:
+            # calc_ipk with its factor from the lookup table
+            return f"""\
+        ipk = {model['gpk']} * ({self._table('rec_ipk')}) * (u_old - Ek)
+"""
+        return f"""\
+        ipk = calc_ipk(
+            u_old, Ek,
+            {model['gpk']}
+        )
+"""
+
+    def _generate_reciprocals(self) -> str:
+        model = {name: self._indexing(name) for name in ("Vc", "Vss", "F")}
+        return f"""\
+inverseVcF2 = 1.0 / (2 * {model['Vc']} * {model['F']})
+inverseVcF = 1.0 / ({model['Vc']} * {model['F']})
+inversevssF2 = 1.0 / (2 * {model['Vss']} * {model['F']})
+"""
+
+    def _reciprocals_per_cell(self) -> bool:
+        return any(name in self.arrays for name in ("Vc", "Vss", "F"))
+
+    def generate_prologue(self) -> str:
+        # computed once per call unless the volumes are given per node; the
+        # constant factors inside the ops (F/(R*T), Vsr/Vss) are hoisted out
+        # of the loop by the compiler once the ops are inlined
+        if self._reciprocals_per_cell():
+            return ""
+        return textwrap.indent(self._generate_reciprocals(), "    ")
 
     def generate_body(self) -> str:
         model = {name: self._indexing(name) for name in self.args_order}
         u_new = f"u_new{self._raw_indexing()}"
+        reciprocals = ""
+        if self._reciprocals_per_cell():
+            reciprocals = textwrap.indent(self._generate_reciprocals(), " " * 8)
 
         return f"""\
-        inverseVcF2 = 1.0 / (2 * {model['Vc']} * {model['F']})
-        inverseVcF = 1.0 / ({model['Vc']} * {model['F']})
-        inversevssF2 = 1.0 / (2 * {model['Vss']} * {model['F']})
-
+{reciprocals}
         # Old state
         u_old = {model['u']}
         m_old = {model['m']}
@@ -72,100 +245,28 @@ class TenTusscherPanfilov2006Kernel(IonicKernelGenerator):
         Eks = calc_Eks({model['ko']}, ki_old, {model['nao']}, nai_old, {model['pKNa']}, {model['RTONF']})
         Eca = calc_Eca({model['cao']}, cai_old, {model['RTONF']})
 
-        m_inf = calc_m_inf(u_old)
-        tau_m = calc_tau_m(u_old)
-        m_new = calc_gating_variable_rush_larsen(m_old, m_inf, tau_m, dt)
-
-        h_inf = calc_h_inf(u_old)
-        tau_h = calc_tau_h(u_old)
-        h_new = calc_gating_variable_rush_larsen(h_old, h_inf, tau_h, dt)
-
-        j_inf = h_inf
-        tau_j = calc_tau_j(u_old)
-        j_new = calc_gating_variable_rush_larsen(j_old, j_inf, tau_j, dt)
-        
+{self._generate_gates()}
         ina = calc_ina(u_old, m_old, h_old, j_old, {model['gna']}, Ena)
 
-        d_inf = calc_d_inf(u_old)
-        tau_d = calc_tau_d(u_old)
-        d_new = calc_gating_variable_rush_larsen(d_old, d_inf, tau_d, dt)
-
-        f_inf = calc_f_inf(u_old)
-        tau_f = calc_tau_f(u_old)
-        f_new = calc_gating_variable_rush_larsen(f_old, f_inf, tau_f, dt)
-
-        f2_inf = calc_f2_inf(u_old)
-        tau_f2 = calc_tau_f2(u_old)
-        f2_new = calc_gating_variable_rush_larsen(f2_old, f2_inf, tau_f2, dt)
-
-        fcass_inf = calc_fcass_inf(cass_old)
-        tau_fcass = calc_tau_fcass(cass_old)
-        fcass_new = calc_gating_variable_rush_larsen(fcass_old, fcass_inf, tau_fcass, dt)
-
-        ical = calc_ical(
-            u_old, d_old, f_old, f2_old,
-            fcass_old, {model['cao']}, cass_old,
-            {model['gcal']}, {model['F']},
-            {model['R']}, {model['T']}
-        )
-
-        r_inf = calc_r_inf(u_old)
-        tau_r = calc_tau_r(u_old)
-        r_new = calc_gating_variable_rush_larsen(r_old, r_inf, tau_r, dt)
-
-        s_inf = calc_s_inf(u_old)
-        tau_s = calc_tau_s(u_old)
-        s_new = calc_gating_variable_rush_larsen(s_old, s_inf, tau_s, dt)
-
+{self._generate_ical()}
         ito = calc_ito(u_old, r_old, s_old, Ek, {model['gto']})
 
-        xr1_inf = calc_xr1_inf(u_old)
-        tau_xr1 = calc_tau_xr1(u_old)
-        xr1_new = calc_gating_variable_rush_larsen(xr1_old, xr1_inf, tau_xr1, dt)
-
-        xr2_inf = calc_xr2_inf(u_old)
-        tau_xr2 = calc_tau_xr2(u_old)
-        xr2_new = calc_gating_variable_rush_larsen(xr2_old, xr2_inf, tau_xr2, dt)
-
         ikr = calc_ikr(
             u_old, xr1_old, xr2_old, Ek,
             {model['gkr']}, {model['ko']}
         )
 
-        xs_inf = calc_xs_inf(u_old)
-        tau_xs = calc_tau_xs(u_old)
-        xs_new = calc_gating_variable_rush_larsen(xs_old, xs_inf, tau_xs, dt)
-
         iks = calc_iks(u_old, xs_old, Eks, {model['gks']})
 
         ik1 = calc_ik1(u_old, Ek, {model['gk1']})
 
-        inaca = calc_inaca(
-            u_old, {model['nao']}, nai_old,
-            {model['cao']}, cai_old,
-            {model['KmNai']}, {model['KmCa']},
-            {model['knaca']}, {model['ksat']},
-            {model['n_']}, {model['F']},
-            {model['R']}, {model['T']}
-        )
-
-        inak = calc_inak(
-            u_old, nai_old, {model['ko']},
-            {model['KmK']}, {model['KmNa']},
-            {model['knak']}, {model['F']},
-            {model['R']}, {model['T']}
-        )
-
+{self._generate_pump_currents()}
         ipca = calc_ipca(
             cai_old, {model['KpCa']},
             {model['gpca']}
         )
 
-        ipk = calc_ipk(
-            u_old, Ek,
-            {model['gpk']}
-        )
-
+{self._generate_ipk()}
         ibna = calc_ibna(
             u_old, Ena,
             {model['gbna']}
@@ -266,6 +367,7 @@ class TenTusscherPanfilov2006Kernel(IonicKernelGenerator):
         {model['casr']} = casr_new
         {model['cass']} = cass_new
         {model['cai']} = cai_new
+        # old + dt * rate, contracted to an FMA (fastmath)
         {model['nai']} = nai_old + dt * dnai
         {model['Ki']} = ki_old + dt * dki
 
@@ -299,7 +401,22 @@ class TenTusscherPanfilov2006(CardiacModel):
     D_model : float
         Diffusion coefficient specific to this model (cm²/ms).
     npfloat : str
-        String specifying the floating-point precision to use (e.g., 'float64').
+        String specifying the floating-point precision to use (default:
+        'float64'). The kernel is bound by its exponentials rather than by
+        memory traffic, so 'float32' is only a few percent faster, and the
+        per-step increments of the ion concentrations (e.g. ``Ki``) fall
+        below single precision resolution.
+    lookup_table : bool
+        Whether the gates that depend on the potential only (all but
+        ``fcass``) are updated from a table of their steady states and
+        ``exp(-dt/tau)`` over the potential (-120 to 80 mV by 0.05 mV),
+        interpolated linearly, instead of evaluating the exponentials of the
+        model at every node. The factors of the L-type, exchanger, pump and
+        plateau potassium currents that depend on the potential only are
+        tabulated the same way. The table is rebuilt when ``dt``, ``F``,
+        ``R``, ``T`` or ``n_`` change; these must be scalars. This also takes
+        the ``u >= -40`` branches of ``tau_h`` and ``tau_j`` out of the
+        kernel.
 
     Model Variables
     ---------------
@@ -372,6 +489,9 @@ class TenTusscherPanfilov2006(CardiacModel):
 
         self.D_model = 0.154
         self.npfloat = "float64"
+        self.lookup_table = False
+        self.lut = None
+        self._lut_key = None
 
         self._initialize_variables_and_parameters(ops)
 
@@ -380,7 +500,18 @@ class TenTusscherPanfilov2006(CardiacModel):
 
         self._allocate_state_arrays()
 
-        gen = self._initialize_kernel(TenTusscherPanfilov2006Kernel)
+        if self.lookup_table:
+            arrays = [name for name in ("F", "R", "T", "n_")
+                      if isinstance(getattr(self, name), np.ndarray)]
+            if arrays:
+                raise ValueError(
+                    f"The lookup table requires scalar {', '.join(arrays)}.")
+            self._fill_lookup_table()
+
+        gen = self._initialize_kernel(
+            partial(TenTusscherPanfilov2006Kernel,
+                    lookup_table=self.lookup_table)
+        )
 
         glb = {
             "calc_gating_variable_rush_larsen": jit_ops["calc_gating_variable_rush_larsen"],
@@ -401,7 +532,7 @@ class TenTusscherPanfilov2006(CardiacModel):
             "calc_tau_f2": jit_ops["calc_tau_f2"],
             "calc_fcass_inf": jit_ops["calc_fcass_inf"],
             "calc_tau_fcass": jit_ops["calc_tau_fcass"],
-            "calc_ical": jit_ops["calc_ical"],
+            "calc_where": jit_ops["calc_where"],
             "calc_r_inf": jit_ops["calc_r_inf"],
             "calc_tau_r": jit_ops["calc_tau_r"],
             "calc_s_inf": jit_ops["calc_s_inf"],
@@ -419,6 +550,7 @@ class TenTusscherPanfilov2006(CardiacModel):
             "calc_ik1": jit_ops["calc_ik1"],
             "calc_inaca": jit_ops["calc_inaca"],
             "calc_inak": jit_ops["calc_inak"],
+            "exp": math.exp,
             "calc_ipca": jit_ops["calc_ipca"],
             "calc_ipk": jit_ops["calc_ipk"],
             "calc_ibna": jit_ops["calc_ibna"],
@@ -445,15 +577,66 @@ class TenTusscherPanfilov2006(CardiacModel):
         self._buffs = self._form_and_verify_observers()
 
     def run_ionic_kernel(self):
-        args = [getattr(self, name) for name in self._kernel_args_order]
-        self._kernel(
-            self.u_new,
-            self.cardiac_tissue.myo_indexes,
-            self.dt,
-            self.step,
-            *args,
-            *self._buffs,
-        )
+        if self.lookup_table and self._lut_key != self._lookup_table_key():
+            # dt (or F, R, T, n_) was changed during the run, the table is
+            # refilled in place
+            self.synchronize()
+            self._fill_lookup_table()
+            self.synchronize(to_device=True)
+
+        self._run_kernel()
+
+    def _lookup_table_key(self):
+        return (self.dt, self.F, self.R, self.T, self.n_)
+
+    def _fill_lookup_table(self):
+        """
+        Fills the lookup table: for every potential of the grid the steady
+        state and ``exp(-dt/tau)`` of each gate in ``TABLE_GATES``, in that
+        order, followed by the current factors in ``TABLE_FACTORS``.
+        """
+        u = TABLE_U_MIN + TABLE_U_STEP * np.arange(
+            round((TABLE_U_MAX - TABLE_U_MIN) / TABLE_U_STEP) + 1)
+        shape = (len(u), 2 * len(TABLE_GATES) + len(TABLE_FACTORS))
+        if self.lut is None or self.lut.shape != shape:
+            self.lut = np.empty(shape)
+
+        for n, (inf, tau) in enumerate(TABLE_GATES.values()):
+            calc_inf, calc_tau = jit_ops[inf], jit_ops[tau]
+            self.lut[:, 2 * n] = [calc_inf(x) for x in u]
+            self.lut[:, 2 * n + 1] = np.exp(-self.dt / np.array(
+                [calc_tau(x) for x in u]))
+
+        # the exchanger, Na/K pump and plateau K factors come from the ops,
+        # called with the other arguments set so that only the factor is left
+        calc_inaca, calc_inak, calc_ipk = (
+            jit_ops[name] for name in ("calc_inaca", "calc_inak", "calc_ipk"))
+        F, R, T, n_ = self.F, self.R, self.T, self.n_
+        # the L-type factors are the same expressions as the kernel
+        ical_x = 2 * (u - 15) * F / (R * T)
+        ical_e = np.exp(ical_x) - 1
+        ical_small = np.abs(ical_x) < 1e-4
+        factors = {
+            # nao = cai = ksat = 0, nai = cao = KmNai = knaca = 1, KmCa = 0
+            "exp_nx": [calc_inaca(x, 0., 1., 1., 0., 1., 0., 1., 0., n_, F, R, T)
+                       for x in u],
+            # nai = cao = KmNai = ksat = 0, nao = KmCa = knaca = 1,
+            # cai = -1/2.5
+            "exp_n1x": [calc_inaca(x, 1., 0., 0., -0.4, 0., 1., 1., 0., n_, F, R, T)
+                        for x in u],
+            # nai = ko = knak = 1, KmK = KmNa = 0
+            "rec_inak": [calc_inak(x, 1., 1., 0., 0., 1., F, R, T) for x in u],
+            "ical_e": ical_e,
+            "ical_q": np.where(ical_small,
+                               1 - ical_x / 2 + ical_x * ical_x / 12,
+                               ical_x / np.where(ical_small, 1., ical_e)),
+            # u - Ek = 1, gpk = 1
+            "rec_ipk": [calc_ipk(x, x - 1., 1.) for x in u],
+        }
+        for n, name in enumerate(TABLE_FACTORS):
+            self.lut[:, 2 * len(TABLE_GATES) + n] = factors[name]
+
+        self._lut_key = self._lookup_table_key()
 
     def select_stencil(self, cardiac_tissue):
         if cardiac_tissue.fibers is None:
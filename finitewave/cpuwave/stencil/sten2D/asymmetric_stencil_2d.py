@@ -38,11 +38,21 @@ class AsymmetricStencil2D(Stencil):
     - ``w[i, j, 8] : (i+1, j+1)``.
     """
 
+    offsets = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 0), (0, 1),
+               (1, -1), (1, 0), (1, 1))
+
     def __init__(self):
         super().__init__()
         self.D_al = 1
         self.D_ac = 1/9
 
+    def weights_key(self):
+        """
+        Returns the stencil type and the diffusion coefficients ``D_al`` and
+        ``D_ac`` the weights depend on.
+        """
+        return (*super().weights_key(), self.D_al, self.D_ac)
+
     def compute_weights(self, model, cardiac_tissue):
         """
         Computes the weights for diffusion on a 2D mesh using an asymmetric
@@ -72,7 +82,7 @@ class AsymmetricStencil2D(Stencil):
             message = "Fibers must be provided for anisotropic diffusion."
             raise ValueError(message)
 
-        weights = np.zeros((*mesh.shape, 9))
+        weights = np.zeros((*mesh.shape, 9), dtype=model.npfloat)
         d_xx, d_xy = self.compute_half_step_diffusion(mesh, conductivity,
                                                       fibers, 0)
         d_yx, d_yy = self.compute_half_step_diffusion(mesh, conductivity,
@@ -161,8 +171,8 @@ class AsymmetricStencil2D(Stencil):
                 (D_al - D_ac) * fibers[..., ind0] * fibers[..., ind1])
 
 
-@njit(parallel=True)
-def diffusion_kernel_2d_aniso(u_new, u, w, indexes):
+@njit(parallel=True, cache=True)
+def diffusion_kernel_2d_aniso(u_new, u, w, coords):
     """
     Performs anisotropic diffusion on a 2D grid.
 
@@ -174,20 +184,18 @@ def diffusion_kernel_2d_aniso(u_new, u, w, indexes):
         Array representing the current potential values before diffusion.
     w : np.ndarray
         Array of weights used in the diffusion computation.
-    mesh : np.ndarray
-        Array representing the mesh of the tissue.
+    coords : np.ndarray
+        Coordinates of the myocytes where the diffusion is computed, one
+        int32 row per axis (``myo_coords`` of the tissue).
 
     Returns
     -------
     np.ndarray
         The updated potential values after diffusion.
     """
-    n_i = u.shape[0]
-    n_j = u.shape[1]
-    for ind in prange(len(indexes)):
-        ii = indexes[ind]
-        i = int(ii / n_j)
-        j = ii % n_j
+    for ind in prange(coords.shape[1]):
+        i = coords[0, ind]
+        j = coords[1, ind]
 
         u_new[i, j] = (u[i-1, j-1] * w[i, j, 0] +
                        u[i-1, j] * w[i, j, 1] +
@@ -201,7 +209,7 @@ def diffusion_kernel_2d_aniso(u_new, u, w, indexes):
     return u_new
 
 
-@njit
+@njit(cache=True)
 def minor_component(d, m0, m1, m2, m3, m4, m5):
     """
     Calculates the minor component for the diffusion current.
@@ -259,7 +267,7 @@ def minor_component(d, m0, m1, m2, m3, m4, m5):
     return w0, w1, w2, w3, w4, w5
 
 
-@njit
+@njit(cache=True)
 def major_component(d, m0):
     """
     Computes the major component for the difussion current.
@@ -288,7 +296,7 @@ def major_component(d, m0):
     return d * m0
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def compute_weights(w, m, d_xx, d_xy, d_yx, d_yy):
     """
     Computes the weights for diffusion on a 2D mesh based on the asymmetric
@@ -24,6 +24,8 @@ class IsotropicStencil2D(Stencil):
     by the ``conductivity`` parameter.
     """
 
+    offsets = ((-1, 0), (0, -1), (0, 0), (0, 1), (1, 0))
+
     def __init__(self):
         super().__init__()
 
@@ -94,8 +96,8 @@ class IsotropicStencil2D(Stencil):
         return D
 
 
-@njit(parallel=True)
-def diffusion_kernel_2d_iso(u_new, u, w, indexes):
+@njit(parallel=True, cache=True)
+def diffusion_kernel_2d_iso(u_new, u, w, coords):
     """
     Performs isotropic diffusion on a 2D grid.
 
@@ -108,20 +110,18 @@ def diffusion_kernel_2d_iso(u_new, u, w, indexes):
     w : numpy.ndarray
         A 3D array of weights used in the diffusion computation.
         The shape should match (*mesh.shape, 5).
-    mesh : numpy.ndarray
-        A 2D array representing the mesh of the tissue.
+    coords : numpy.ndarray
+        Coordinates of the myocytes where the diffusion is computed, one
+        int32 row per axis (``myo_coords`` of the tissue).
 
     Returns
     -------
     numpy.ndarray
         The updated potential values after diffusion.
     """
-    n_i = u.shape[0]
-    n_j = u.shape[1]
-    for ind in prange(len(indexes)):
-        ii = indexes[ind]
-        i = int(ii / n_j)
-        j = ii % n_j
+    for ind in prange(coords.shape[1]):
+        i = coords[0, ind]
+        j = coords[1, ind]
 
         u_new[i, j] = (u[i-1, j] * w[i, j, 0] +
                        u[i, j-1] * w[i, j, 1] +
@@ -132,7 +132,7 @@ def diffusion_kernel_2d_iso(u_new, u, w, indexes):
     return u_new
 
 
-@njit
+@njit(cache=True)
 def compute_component(d, m0, m1):
     """
     Computes the component for isotropic diffusion in 2D.
@@ -158,7 +158,7 @@ def compute_component(d, m0, m1):
     return d * m0 * (m0 + (m1 == 0))
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def compute_weights(w, m, d_xx, d_yy):
     """
     Computes the weights for isotropic diffusion in 2D.
@@ -117,7 +117,7 @@ class SymmetricStencil2D(AsymmetricStencil2D):
         return D
 
 
-@njit
+@njit(cache=True)
 def compute_components(d_xx, d_xy, d_yx, d_yy, m0, m1, m2, m3, qx, qy):
     """
     .. code-block:: text
@@ -149,14 +149,14 @@ def compute_components(d_xx, d_xy, d_yx, d_yy, m0, m1, m2, m3, qx, qy):
     return 0.5 * w0, 0.5 * w1, 0.5 * w2, 0.5 * w3
 
 
-@njit
+@njit(cache=True)
 def compute_component_(m0, m1, m2, m3, d_xx, d_xy, d_yx, d_yy, qx, qy, ux, uy):
     m = m0 * m1 * m2 * m3
     w = (qx * (d_xx * ux + d_xy * uy) + qy * (d_yx * ux + d_yy * uy)) * m
     return 0.25 * w
 
 
-@njit
+@njit(cache=True)
 def compute_weights(w, m, d_xx, d_xy, d_yx, d_yy):
     """
     Computes the weights for diffusion on a 2D mesh based on the asymmetric
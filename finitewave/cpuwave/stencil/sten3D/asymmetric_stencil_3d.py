@@ -44,6 +44,11 @@ class AsymmetricStencil3D(AsymmetricStencil2D):
         ``w[i, j, k, 18] : (i+1, j, k+1)``.
     """
 
+    offsets = ((-1, -1, 0), (-1, 0, 0), (-1, 1, 0), (0, -1, 0), (0, 0, 0),
+               (0, 1, 0), (1, -1, 0), (1, 0, 0), (1, 1, 0), (0, -1, -1),
+               (0, -1, 1), (0, 0, -1), (0, 0, 1), (0, 1, -1), (0, 1, 1),
+               (-1, 0, -1), (1, 0, -1), (-1, 0, 1), (1, 0, 1))
+
     def __init__(self):
         super().__init__()
 
@@ -105,8 +110,8 @@ class AsymmetricStencil3D(AsymmetricStencil2D):
         return weights
 
 
-@njit(parallel=True)
-def diffusion_kernel_3d_aniso(u_new, u, w, indexes):
+@njit(parallel=True, cache=True)
+def diffusion_kernel_3d_aniso(u_new, u, w, coords):
     """
     Performs anisotropic diffusion on a 3D grid.
 
@@ -121,22 +126,19 @@ def diffusion_kernel_3d_aniso(u_new, u, w, indexes):
     w : numpy.ndarray
         Array of weights for diffusion, with the shape of (*mesh.shape, 19).
 
-    mesh : numpy.ndarray
-        Array representing the mesh of the tissue.
+    coords : numpy.ndarray
+        Coordinates of the myocytes where the diffusion is computed, one
+        int32 row per axis (``myo_coords`` of the tissue).
 
     Returns
     -------
     np.ndarray
         The updated potential values after diffusion.
     """
-    n_j = u.shape[1]
-    n_k = u.shape[2]
-
-    for ind in prange(len(indexes)):
-        ii = indexes[ind]
-        i = ii//(n_j*n_k)
-        j = (ii % (n_j*n_k))//n_k
-        k = (ii % (n_j*n_k)) % n_k
+    for ind in prange(coords.shape[1]):
+        i = coords[0, ind]
+        j = coords[1, ind]
+        k = coords[2, ind]
 
         u_new[i, j, k] = (u[i-1, j-1, k] * w[i, j, k, 0] +
                           u[i-1, j, k] * w[i, j, k, 1] +
@@ -160,7 +162,7 @@ def diffusion_kernel_3d_aniso(u_new, u, w, indexes):
     return u_new
 
 
-@njit
+@njit(cache=True)
 def compute_weights(w, m, d_xx, d_xy, d_xz, d_yx, d_yy, d_yz, d_zx, d_zy,
                     d_zz):
     """
@@ -28,6 +28,9 @@ class IsotropicStencil3D(IsotropicStencil2D):
     by the ``conductivity`` parameter.
     """
 
+    offsets = ((-1, 0, 0), (0, -1, 0), (0, 0, -1), (0, 0, 0), (0, 0, 1),
+               (0, 1, 0), (1, 0, 0))
+
     def __init__(self):
         super().__init__()
 
@@ -74,8 +77,8 @@ class IsotropicStencil3D(IsotropicStencil2D):
         return weights
 
 
-@njit(parallel=True)
-def diffusion_kernel_3d_iso(u_new, u, w, indexes):
+@njit(parallel=True, cache=True)
+def diffusion_kernel_3d_iso(u_new, u, w, coords):
     """
     Performs isotropic diffusion on a 3D grid.
 
@@ -88,17 +91,14 @@ def diffusion_kernel_3d_iso(u_new, u, w, indexes):
     w : numpy.ndarray
         A 4D array of weights used in the diffusion computation.
         The shape should match (*mesh.shape, 7).
-    indexes : numpy.ndarray
-        A 1D array of indices where the diffusion should be computed.
+    coords : numpy.ndarray
+        Coordinates of the myocytes where the diffusion is computed, one
+        int32 row per axis (``myo_coords`` of the tissue).
     """
-    n_j = u.shape[1]
-    n_k = u.shape[2]
-
-    for ind in prange(len(indexes)):
-        ii = indexes[ind]
-        i = ii//(n_j*n_k)
-        j = (ii % (n_j*n_k))//n_k
-        k = (ii % (n_j*n_k)) % n_k
+    for ind in prange(coords.shape[1]):
+        i = coords[0, ind]
+        j = coords[1, ind]
+        k = coords[2, ind]
 
         u_new[i, j, k] = (u[i-1, j, k] * w[i, j, k, 0] +
                           u[i, j-1, k] * w[i, j, k, 1] +
@@ -109,7 +109,7 @@ def diffusion_kernel_3d_iso(u_new, u, w, indexes):
                           u[i+1, j, k] * w[i, j, k, 6])
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def compute_weights(w, m, d_xx, d_yy, d_zz):
     n_i = m.shape[0]
     n_j = m.shape[1]
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import shutil
 import numpy as np
@@ -17,6 +18,11 @@ class AnimationTracker(Tracker):
     Saves frames as .npy snapshots, then can build an animation via:
     - Animation2DBuilder for 2D fields
     - Animation3DBuilder for 3D fields
+
+    With ``background_write`` (default False) the frames are written by a
+    background thread while the simulation continues, which pays off when
+    writing is slow and a core is left for the writer. The frames are
+    complete on disk when the run of the model returns.
     """
 
     def __init__(self):
@@ -26,6 +32,8 @@ class AnimationTracker(Tracker):
         self.frame_type = "float64"
         self._frame_counter = 0
         self.overwrite = True
+        self.background_write = False
+        self._io_pool = None
 
         # Optional: allow forcing dimension (if None: auto from model.u.ndim)
         self.ndim = None
@@ -40,6 +48,7 @@ class AnimationTracker(Tracker):
         model : object
             The cardiac tissue model object containing the data to be tracked.
         """
+        self.finalize() # frames of a previous run
         self.model = model
         self._frame_counter = 0 # Reset frame counter
 
@@ -56,22 +65,65 @@ class AnimationTracker(Tracker):
         else:
             self._ndim = int(self.ndim)
 
+        # the frame buffers and the nodes outside the tissue are reused for
+        # every frame instead of copying and comparing the mesh each time;
+        # with the background writer one buffer is filled while the other
+        # is written
+        mesh = self.model.cardiac_tissue.mesh
+        self._dir_path = dir_path
+        self._outside = mesh != 1
+        n_buffers = 2 if self.background_write else 1
+        self._frames = [np.empty(mesh.shape, dtype=self.frame_type)
+                        for _ in range(n_buffers)]
+        self._pending = [None] * n_buffers
+
     def _track(self):
-        # grab target field
+        # grab target field (only u is kept up to date on the host by CUDA
+        # kernels)
+        if self.variable_name != "u":
+            self.model.synchronize()
         arr = self.model.__dict__[self.variable_name]
-        frame = arr.copy()
-
-        # set outside tissue to nan (works for both 2D/3D)
-        mesh = self.model.cardiac_tissue.mesh
-        frame[mesh != 1] = np.nan
 
-        dir_path = Path(self.path, self.dir_name)
-        np.save(
-            dir_path.joinpath(str(self._frame_counter)).with_suffix(".npy"),
-            frame.astype(self.frame_type),
-        )
+        # wait until the buffer is written (raises errors of the writer)
+        index = self._frame_counter % len(self._frames)
+        if self._pending[index] is not None:
+            self._pending[index].result()
+            self._pending[index] = None
+
+        # cast into the frame buffer and set outside tissue to nan
+        # (works for both 2D/3D)
+        frame = self._frames[index]
+        np.copyto(frame, arr, casting="unsafe")
+        frame[self._outside] = np.nan
+
+        file_name = self._dir_path / f"{self._frame_counter}.npy"
+        if len(self._frames) > 1:
+            # started at the first frame of every run, finalize stops it
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=1)
+            self._pending[index] = self._io_pool.submit(_write_frame,
+                                                        file_name, frame)
+        else:
+            _write_frame(file_name, frame)
         self._frame_counter += 1
 
+    def finalize(self):
+        """
+        Waits until all frames are written and stops the background writer.
+        """
+        pool = self._io_pool
+        if pool is None:
+            return
+
+        self._io_pool = None
+        try:
+            for future in self._pending:
+                if future is not None:
+                    future.result()
+        finally:
+            self._pending = [None] * len(self._pending)
+            pool.shutdown(wait=True)
+
     def write(self, path=None, animation_name=None, clear=False, prog_bar=True, **kwargs):
         """
         Build an animation from saved frames.
@@ -97,6 +149,8 @@ class AnimationTracker(Tracker):
         -------------------------
         cmap="viridis", clim=[0,1], scalar_bar=False, format="mp4", plus builder-specific kwargs
         """
+        self.finalize()
+
         path_load = Path(self.path, self.dir_name)
         path_save = Path(self.path) if path is None else Path(path)
         name = self.dir_name if animation_name is None else animation_name
@@ -191,4 +245,9 @@ class AnimationTracker(Tracker):
             raise ValueError(f"Unsupported ndim={ndim} for animation. Expected 2 or 3.")
 
         if clear:
-            shutil.rmtree(path_load)
\ No newline at end of file
+            shutil.rmtree(path_load)
+
+
+def _write_frame(file_name, frame):
+    with open(file_name, "wb") as file:
+        np.lib.format.write_array(file, frame, allow_pickle=False)
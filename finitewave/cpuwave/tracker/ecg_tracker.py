@@ -56,7 +56,7 @@ class ECGTracker(Tracker):
             self.u_tr,
             self.model.u,
             self.model.weights,
-            self.model.cardiac_tissue.myo_indexes,
+            self.model.cardiac_tissue.myo_coords,
         )
 
         # compute ecg
@@ -65,7 +65,7 @@ class ECGTracker(Tracker):
             self.model.u,
             self.measure_coords,
             float(self.model.dr),
-            self.model.cardiac_tissue.myo_indexes,
+            self.model.cardiac_tissue.myo_coords,
         )
 
     def _track(self):
@@ -80,8 +80,8 @@ class ECGTracker(Tracker):
         np.save(Path(self.path).joinpath(self.file_name), self.output)
 
 
-@njit(parallel=True)
-def _compute_ecg_2d(u_tr, u, coords, dr, indexes):
+@njit(parallel=True, cache=True)
+def _compute_ecg_2d(u_tr, u, coords, dr, myo_coords):
     """
     2D: u is (ni, nj). coords is (n_points, 3) -> (x,y,z_height).
     Distance is (x-i)^2 + (y-j)^2 + (z_height)^2
@@ -96,10 +96,9 @@ def _compute_ecg_2d(u_tr, u, coords, dr, indexes):
         The coordinates of the measurement point.
     dr : float
         The spatial resolution of the grid.
-    indexes : numpy.ndarray
-        A 1D array of indices of the healthy tissue points.
+    myo_coords : numpy.ndarray
+        Coordinates of the healthy tissue points, one int32 row per axis.
     """
-    n_j = u.shape[1]
     n_c = coords.shape[0]
     ecg = np.zeros(n_c)
 
@@ -109,10 +108,9 @@ def _compute_ecg_2d(u_tr, u, coords, dr, indexes):
         z = coords[c, 2]  # height above plane
         ecg_ = 0.0
 
-        for ind in prange(len(indexes)):
-            ii = indexes[ind]
-            i = ii // n_j
-            j = ii % n_j
+        for ind in prange(myo_coords.shape[1]):
+            i = myo_coords[0, ind]
+            j = myo_coords[1, ind]
 
             d = (x - i) * (x - i) + (y - j) * (y - j) + z * z
             if d > 0.0:
@@ -123,8 +121,8 @@ def _compute_ecg_2d(u_tr, u, coords, dr, indexes):
     return ecg
 
 
-@njit(parallel=True)
-def _compute_ecg_3d(u_tr, u, coords, dr, indexes):
+@njit(parallel=True, cache=True)
+def _compute_ecg_3d(u_tr, u, coords, dr, myo_coords):
     """
     3D: u is (ni, nj, nk). coords is (n_points, 3) -> (x,y,z).
     Distance is (x-i)^2 + (y-j)^2 + (z-k)^2
@@ -139,13 +137,9 @@ def _compute_ecg_3d(u_tr, u, coords, dr, indexes):
         The coordinates of the measurement point.
     dr : float
         The spatial resolution of the grid.
-    indexes : numpy.ndarray
-        A 1D array of indices of the healthy tissue points.
+    myo_coords : numpy.ndarray
+        Coordinates of the healthy tissue points, one int32 row per axis.
     """
-    n_j = u.shape[1]
-    n_k = u.shape[2]
-    n_jk = n_j * n_k
-
     n_c = coords.shape[0]
     ecg = np.zeros(n_c)
 
@@ -155,12 +149,10 @@ def _compute_ecg_3d(u_tr, u, coords, dr, indexes):
         z = coords[c, 2]
         ecg_ = 0.0
 
-        for ind in prange(len(indexes)):
-            ii = indexes[ind]
-            i = ii // n_jk
-            jk = ii - i * n_jk
-            j = jk // n_k
-            k = jk - j * n_k
+        for ind in prange(myo_coords.shape[1]):
+            i = myo_coords[0, ind]
+            j = myo_coords[1, ind]
+            k = myo_coords[2, ind]
 
             d = (x - i) * (x - i) + (y - j) * (y - j) + (z - k) * (z - k)
             if d > 0.0:
@@ -96,7 +96,7 @@ class SpiralWaveCoreTracker(Tracker):
         self.output.to_csv(Path(self.path, self.file_name).with_suffix(".csv"), index=False)
 
 
-@njit
+@njit(cache=True)
 def _correct_tip_pos(i, j, u, u_new, threshold):
     AC = u[i, j] - u[i, j + 1] + u[i + 1, j + 1] - u[i + 1, j]
     GC = u[i, j + 1] - u[i, j]
@@ -142,7 +142,7 @@ def _correct_tip_pos(i, j, u, u_new, threshold):
     return
 
 
-@njit
+@njit(cache=True)
 def _apply_threshold(i, j, u, threshold):
     if (u[i, j] >= threshold and (u[i + 1, j] < threshold or u[i, j + 1] < threshold or u[i + 1, j + 1] < threshold)):
         return 1
@@ -151,7 +151,7 @@ def _apply_threshold(i, j, u, threshold):
     return 0
 
 
-@njit
+@njit(cache=True)
 def _track_tip_line(u, u_new, threshold, delta):
     out = List()
     size_i, size_j = u.shape
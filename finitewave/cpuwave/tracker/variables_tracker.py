@@ -78,6 +78,10 @@ class VariablesTracker(Tracker):
         # Make possible to track multiple cells
         coord = tuple(self._inds[:, d] for d in range(self._inds.shape[1]))
 
+        # only u is kept up to date on the host by CUDA kernels
+        if any(var_ != "u" for var_ in self.var_list):
+            self.model.synchronize()
+
         for var_ in self.var_list:
             arr = getattr(self.model, var_)
 
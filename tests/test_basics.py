@@ -5,7 +5,7 @@ import pytest
 import finitewave as fw
 
 
-def test_state_loading():
+def test_state_loading(tmp_path):
     n = 5
     tissue = fw.CardiacTissue([n, n])
 
@@ -14,7 +14,7 @@ def test_state_loading():
                                                  n//2, n//2 + 1, u_max=1))
 
     state_saver = fw.StateSaverCollection()
-    state_saver.savers.append(fw.StateSaver("state_0", time=3))
+    state_saver.savers.append(fw.StateSaver(str(tmp_path / "state_0"), time=3))
 
     model = fw.FentonKarma()
     model.dt = 0.01
@@ -38,7 +38,7 @@ def test_state_loading():
     model.t_max = 2
 
     model.cardiac_tissue = tissue
-    model.state_loader = fw.StateLoader("state_0")
+    model.state_loader = fw.StateLoader(str(tmp_path / "state_0"))
 
     model.run()
     u_after = model.u.copy()
@@ -58,6 +58,48 @@ def test_state_loading():
     assert np.allclose(v_before, v_after, atol=1e-3), "v states are not equal"
     assert np.allclose(w_before, w_after, atol=1e-3), "w states are not equal"
 
+def test_state_loading_precision(tmp_path):
+    # a double precision state loaded into a single precision model
+    def make_model(npfloat, t_max):
+        model = fw.AlievPanfilov()
+        model.npfloat = npfloat
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = t_max
+        model.prog_bar = False
+        model.cardiac_tissue = fw.CardiacTissue([10, 10])
+        return model
+
+    model = make_model("float64", 2)
+    stim_sequence = fw.StimSequence()
+    stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, 9))
+    model.stim_sequence = stim_sequence
+    state_saver = fw.StateSaverCollection()
+    state_saver.savers.append(fw.StateSaver(str(tmp_path / "state"), time=1))
+    model.state_saver = state_saver
+    model.run()
+    u_double = model.u.copy()
+
+    model = make_model("float32", 1)
+    model.state_loader = fw.StateLoader(str(tmp_path / "state"))
+    model.run()
+    assert model.u.dtype == np.float32
+    assert np.allclose(model.u, u_double, atol=1e-5)
+
+    # state arrays replaced by a command at another precision
+    class ReplaceCommand(fw.Command):
+        def execute(self, model):
+            model.u = model.u.astype(np.float64)
+
+    model = make_model("float32", 1)
+    model.stim_sequence = stim_sequence
+    command_sequence = fw.CommandSequence()
+    command_sequence.add_command(ReplaceCommand(0.5))
+    model.command_sequence = command_sequence
+    model.run()
+    assert model.u.dtype == np.float32
+    assert model.u_new.dtype == np.float32
+
 def test_commands():
     n = 5
     tissue = fw.CardiacTissue([n, n])
@@ -82,4 +124,454 @@ def test_commands():
 
     model.run()   
 
-    assert np.mean(model.u[1:-1, 1:-1]) > 0.5, "Command did not work"
\ No newline at end of file
+    assert np.mean(model.u[1:-1, 1:-1]) > 0.5, "Command did not work"
+
+
+def test_command_order():
+    executed = []
+
+    class LogCommand(fw.Command):
+        def execute(self, model):
+            executed.append((self.name, model.step))
+
+    class StepCommand(LogCommand):
+        def update_status(self, model):
+            self.passed = model.step >= 3
+            return self.passed
+
+    command_sequence = fw.CommandSequence()
+    for name, time in [("b", 0.05), ("a", 0.02), ("c", 0.05)]:
+        command = LogCommand(time)
+        command.name = name
+        command_sequence.add_command(command)
+    command = StepCommand()
+    command.name = "step"
+    command_sequence.add_command(command)
+
+    model = fw.AlievPanfilov()
+    model.dt = 0.01
+    model.dr = 0.25
+    model.t_max = 0.1
+    model.prog_bar = False
+    model.cardiac_tissue = fw.CardiacTissue([5, 5])
+    model.command_sequence = command_sequence
+
+    model.run()
+
+    assert [name for name, _ in executed] == ["a", "step", "b", "c"]
+
+def test_command_rearm():
+    executed = []
+
+    class PeriodicCommand(fw.Command):
+        def execute(self, model):
+            executed.append(("periodic", model.step))
+            self.t += 0.03
+            self.passed = False
+
+    class LogCommand(fw.Command):
+        def execute(self, model):
+            executed.append(("log", model.step))
+
+    class MoveCommand(fw.Command):
+        def execute(self, model):
+            log.t = 0.07
+
+    log = LogCommand(0.04)
+    command_sequence = fw.CommandSequence()
+    command_sequence.add_command(PeriodicCommand(0.))
+    command_sequence.add_command(log)
+    command_sequence.add_command(MoveCommand(0.02))
+
+    model = fw.AlievPanfilov()
+    model.dt = 0.01
+    model.dr = 0.25
+    model.t_max = 0.1
+    model.prog_bar = False
+    model.cardiac_tissue = fw.CardiacTissue([5, 5])
+    model.command_sequence = command_sequence
+
+    model.run()
+
+    # commands run after the step, t = 0 at step 1
+    assert [step for name, step in executed if name == "periodic"] == [1, 3, 6, 9]
+    # moved by another command, executed at its new time only
+    assert [step for name, step in executed if name == "log"] == [7]
+
+def test_command_parameters():
+    # kernel arguments are bound once, parameters changed by commands
+    # must still reach the kernel
+    class ParameterCommand(fw.Command):
+        def execute(self, model):
+            model.k = 0.
+
+    outputs = []
+    for command in (True, False):
+        model = fw.AlievPanfilov()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 1
+        model.prog_bar = False
+        model.cardiac_tissue = fw.CardiacTissue([10, 10])
+        stim_sequence = fw.StimSequence()
+        stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, 9))
+        model.stim_sequence = stim_sequence
+        if command:
+            command_sequence = fw.CommandSequence()
+            command_sequence.add_command(ParameterCommand(0.))
+            model.command_sequence = command_sequence
+        model.run()
+        outputs.append(model.u.copy())
+
+    assert not np.allclose(outputs[0], outputs[1])
+
+def test_parameter_field_layout():
+    # transposed parameter fields are stored row-major for the kernels
+    field = np.linspace(0.1, 0.15, 100).reshape(10, 10)
+
+    outputs = []
+    for a in (field, np.asfortranarray(field)):
+        model = fw.AlievPanfilov()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 1
+        model.prog_bar = False
+        model.cardiac_tissue = fw.CardiacTissue([10, 10])
+        stim_sequence = fw.StimSequence()
+        stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, 9))
+        model.stim_sequence = stim_sequence
+        model.a = a
+        model.run()
+        assert model.a.flags.c_contiguous
+        outputs.append(model.u.copy())
+
+    assert np.array_equal(outputs[0], outputs[1])
+
+def test_subnormal_flush():
+    # values below 1e-30 are flushed in single precision only
+    tiny = {}
+    for npfloat in ("float64", "float32"):
+        model = fw.AlievPanfilov()
+        model.npfloat = npfloat
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 2
+        model.prog_bar = False
+        model.cardiac_tissue = fw.CardiacTissue([100, 5])
+        stim_sequence = fw.StimSequence()
+        stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 0, 3, 0, 5))
+        model.stim_sequence = stim_sequence
+        model.run()
+        u = np.abs(model.u)
+        tiny[npfloat] = np.count_nonzero((u > 0) & (u < 1e-30))
+
+    assert tiny["float64"] > 0
+    assert tiny["float32"] == 0
+
+def test_specialize_parameters():
+    outputs = []
+    for specialize in (False, True):
+        model = fw.AlievPanfilov()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 1
+        model.prog_bar = False
+        model.cardiac_tissue = fw.CardiacTissue([10, 10])
+        stim_sequence = fw.StimSequence()
+        stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, 9))
+        model.stim_sequence = stim_sequence
+        model.specialize_parameters = specialize
+        model.run()
+        outputs.append(model.u.copy())
+
+    assert "k" not in model._kernel_args_order
+    assert np.allclose(outputs[0], outputs[1])
+
+    # compiled parameters can not be changed without re-initialization
+    model.k = 0.
+    model.t_max = 2
+    with pytest.raises(ValueError, match="compiled"):
+        model.run(initialize=False)
+
+def test_kernel_loops():
+    n = 10
+    tissue = fw.CardiacTissue([n, n])
+
+    stim_sequence = fw.StimSequence()
+    stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, n - 1))
+
+    outputs = {}
+    for loop, fuse in [("sparse", False), ("masked", False), ("dense", False),
+                       ("tiled", True)]:
+        model = fw.AlievPanfilov()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 5
+        model.prog_bar = False
+        model.kernel_loop = loop
+        model.fuse_diffusion = fuse
+
+        model.cardiac_tissue = tissue
+        model.stim_sequence = stim_sequence
+
+        model.run()
+        outputs[loop] = model.u.copy()
+
+    assert np.allclose(outputs["sparse"], outputs["masked"]), "masked loop differs"
+    assert np.allclose(outputs["sparse"], outputs["dense"]), "dense loop differs"
+    assert np.allclose(outputs["sparse"], outputs["tiled"]), "fused tiled loop differs"
+
+    model.kernel_loop = "auto"
+    model.run()
+    assert model._kernel_loop == "dense"
+
+    tissue.mesh[4:6, 4:6] = 2
+    model.run()
+    assert model._kernel_loop == "masked"
+
+    tissue.mesh[2:-2, 1:-1] = 0
+    model.run()
+    assert model._kernel_loop == "sparse"
+
+    tissue.mesh[2:-2, 1:-1] = 1
+    tissue.mesh[4:6, 4:6] = 2
+    model.kernel_loop = "dense"
+    with pytest.raises(ValueError):
+        model.run()
+
+
+def test_bulk_weights():
+    # bulk nodes of the fused kernel share one row of weights
+    tissue = fw.CardiacTissue([30, 30])
+    tissue.mesh[10:15, 10:15] = 0
+    tissue.conductivity = np.ones([30, 30])
+    tissue.conductivity[20:, :] = 0.5
+
+    outputs = []
+    for fuse in (False, True):
+        model = fw.AlievPanfilov()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 2
+        model.prog_bar = False
+        model.cardiac_tissue = tissue
+        model.fuse_diffusion = fuse
+        stim_sequence = fw.StimSequence()
+        stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 4, 1, 29))
+        model.stim_sequence = stim_sequence
+        model.run()
+        outputs.append(model.u.copy())
+
+    bulk = model._diffusion_args["bulk"]
+    assert bulk[5, 5] and not bulk[25, 5] and not bulk[9, 12]
+    assert np.allclose(outputs[0], outputs[1], atol=1e-6)
+
+def test_weights_reuse():
+    model = fw.AlievPanfilov()
+    model.dt = 0.01
+    model.dr = 0.25
+    model.t_max = 0.1
+    model.prog_bar = False
+    model.cardiac_tissue = fw.CardiacTissue([10, 10])
+
+    model.run()
+    weights = model.weights
+    model.run()
+    assert model.weights is weights
+
+    # geometry changed in place
+    model.cardiac_tissue.mesh[4, 4] = 0
+    model.run()
+    assert model.weights is not weights
+    assert not model.cardiac_tissue.myo_mask[4, 4]
+    assert model.weights[3, 4, 4] == 0
+
+    # stencil parameters changed
+    tissue = fw.CardiacTissue([10, 10])
+    tissue.fibers = np.zeros((10, 10, 2))
+    tissue.fibers[..., 0] = 1
+
+    models = []
+    for _ in range(2):
+        model = fw.AlievPanfilov()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 0.1
+        model.prog_bar = False
+        model.cardiac_tissue = tissue
+        model.stencil = fw.AsymmetricStencil2D()
+        models.append(model)
+
+    models[0].run()
+    weights = models[0].weights
+    models[0].stencil.D_ac = 1.0
+    models[0].run()
+    assert models[0].weights is not weights
+
+    models[1].stencil.D_ac = 1.0
+    models[1].run()
+    assert np.array_equal(models[0].weights, models[1].weights)
+
+def test_state_arrays_after_rerun():
+    # arrays kept from a previous run are not overwritten
+    model = fw.AlievPanfilov()
+    model.dt = 0.01
+    model.dr = 0.25
+    model.t_max = 1
+    model.prog_bar = False
+    model.cardiac_tissue = fw.CardiacTissue([10, 10])
+    stim_sequence = fw.StimSequence()
+    stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, 9))
+    model.stim_sequence = stim_sequence
+
+    model.run()
+    u0, v0 = model.u, model.v
+    u0_values, v0_values = u0.copy(), v0.copy()
+    model.t_max = 0.01
+    model.run()
+    assert np.array_equal(u0, u0_values)
+    assert np.array_equal(v0, v0_values)
+
+def test_lookup_table():
+    outputs = []
+    for lookup_table in (False, True):
+        model = fw.TenTusscherPanfilov2006()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 5
+        model.prog_bar = False
+        model.cardiac_tissue = fw.CardiacTissue([8, 8])
+        stim_sequence = fw.StimSequence()
+        stim_sequence.add_stim(fw.StimVoltageCoord(0, 20, 1, 3, 1, 7))
+        model.stim_sequence = stim_sequence
+        model.lookup_table = lookup_table
+        model.run()
+        outputs.append(model.u.copy())
+
+    assert np.allclose(outputs[0], outputs[1], atol=1e-2)
+
+    # the table follows dt
+    decay = model.lut[:, 1].copy()
+    model.dt = 0.005
+    model.t_max = 6
+    model.run(initialize=False)
+    assert model._lut_key[0] == 0.005
+    assert np.all(model.lut[:, 1] >= decay)
+
+    # the current factors are tabulated for scalar parameters only
+    model.T = np.full([8, 8], model.T)
+    with pytest.raises(ValueError, match="scalar T"):
+        model.run()
+
+def test_ical_at_15_mv():
+    # the L-type current of the ops is 0/0 at exactly 15 mV
+    model = fw.TenTusscherPanfilov2006()
+    model.dt = 0.01
+    model.dr = 0.25
+    model.t_max = 1
+    model.prog_bar = False
+    model.cardiac_tissue = fw.CardiacTissue([8, 8])
+    model.init_u = 15.
+    model.run()
+
+    assert np.isfinite(model.u).all()
+    assert np.isfinite(model.cass).all()
+
+def test_rush_larsen_gates():
+    # forward Euler gates of Luo-Rudy 1991 diverge at this time step
+    model = fw.LuoRudy91()
+    model.dt = 0.05
+    model.dr = 0.25
+    model.t_max = 20
+    model.prog_bar = False
+    model.cardiac_tissue = fw.CardiacTissue([8, 8])
+    stim_sequence = fw.StimSequence()
+    stim_sequence.add_stim(fw.StimCurrentCoord(0, 100, 1, 1, 3, 1, 7))
+    model.stim_sequence = stim_sequence
+    model.run()
+
+    assert np.isfinite(model.u).all()
+    assert model.u.max() > 0
+
+def test_numpy_kernel():
+    n = 10
+    tissue = fw.CardiacTissue([n, n])
+    tissue.mesh[4:6, 4:6] = 2
+
+    stim_sequence = fw.StimSequence()
+    stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, n - 1))
+
+    outputs = {}
+    for device in ["cpu", "numpy"]:
+        model = fw.AlievPanfilov()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 5
+        model.prog_bar = False
+        model.device = device
+
+        model.cardiac_tissue = tissue
+        model.stim_sequence = stim_sequence
+
+        model.run()
+        outputs[device] = model.u.copy()
+
+    assert np.allclose(outputs["cpu"], outputs["numpy"]), "numpy kernel differs"
+
+
+def test_numpy_kernel_math():
+    # ops using math functions and calc_where
+    outputs = {}
+    for device in ["cpu", "numpy"]:
+        model = fw.FentonKarma()
+        model.dt = 0.01
+        model.dr = 0.25
+        model.t_max = 5
+        model.prog_bar = False
+        model.device = device
+        model.cardiac_tissue = fw.CardiacTissue([10, 10])
+        stim_sequence = fw.StimSequence()
+        stim_sequence.add_stim(fw.StimVoltageCoord(0, 1, 1, 3, 1, 9))
+        model.stim_sequence = stim_sequence
+        model.run()
+        outputs[device] = model.u.copy()
+
+    assert np.allclose(outputs["cpu"], outputs["numpy"]), "numpy kernel differs"
+
+
+def test_kernel_device():
+    from finitewave.cpuwave.model._cuda import cuda_available
+
+    model = fw.AlievPanfilov()
+    model.dt = 0.01
+    model.dr = 0.25
+    model.t_max = 1
+    model.prog_bar = False
+    model.cardiac_tissue = fw.CardiacTissue([10, 10])
+
+    model.device = "gpu"
+    with pytest.raises(ValueError):
+        model.run()
+
+    model.device = "cuda"
+    if cuda_available():
+        model.run()
+        assert np.isfinite(model.u).all()
+
+        # replaced host arrays do not keep their device copies
+        class ReplaceCommand(fw.Command):
+            def execute(self, model):
+                model.v = model.v.copy()
+
+        command_sequence = fw.CommandSequence()
+        for t in np.arange(0.1, 2, 0.1):
+            command_sequence.add_command(ReplaceCommand(t))
+        model.command_sequence = command_sequence
+        model.run()
+        mirrors = len(model._kernel._mirrors)
+        model.t_max = 2
+        model.run(initialize=False)
+        assert len(model._kernel._mirrors) == mirrors
+    else:
+        with pytest.raises(RuntimeError):
+            model.run()
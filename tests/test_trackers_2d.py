@@ -119,6 +119,35 @@ def test_animation_2d_tracker(spiral_model):
 
     shutil.rmtree(tracker.dir_name)
 
+@pytest.mark.animation_2d_tracker
+def test_animation_2d_tracker_background_write(cable_model, tmp_path):
+    frames = {}
+    for background_write in (False, True):
+        tracker = fw.AnimationTracker()
+        tracker.path = tmp_path
+        tracker.dir_name = f"frames_{background_write}"
+        tracker.step = 10
+        tracker.background_write = background_write
+
+        seq = fw.TrackerSequence()
+        seq.add_tracker(tracker)
+        cable_model.tracker_sequence = seq
+
+        cable_model.run()
+        # the writer is restarted when the run is continued
+        cable_model.t_max = 4
+        cable_model.run(initialize=False)
+        cable_model.t_max = 3
+
+        # frames are on disk when the run returns
+        dir_path = tmp_path / tracker.dir_name
+        frames[background_write] = [np.load(dir_path / f"{i}.npy")
+                                    for i in range(tracker._frame_counter)]
+
+    assert len(frames[True]) == len(frames[False]) > 30
+    for frame_sync, frame_bg in zip(frames[False], frames[True]):
+        assert np.array_equal(frame_sync, frame_bg, equal_nan=True)
+
 @pytest.mark.activation_time_2d_tracker
 def test_activation_time_2d_tracker(cable_model):
     # TODO: